@@ -51,5 +51,6 @@ setuptools.setup(
                   "wscodec/encoder/pyencoder/ndef_builder.py:ffibuilder",
                   "wscodec/encoder/pyencoder/demi_builder.py:ffibuilder",
                   "wscodec/encoder/pyencoder/pairhist_builder.py:ffibuilder"],
-    install_requires=["cffi>=1.0.0", "ndeflib>=0.3.2"],
+    install_requires=["cffi>=1.0.0", "ndeflib>=0.3.2", "importlib-metadata; python_version < \"3.8\""],
+    extras_require={"numpy": ["numpy"]},
 )
@@ -22,9 +22,33 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 
+import asyncio
 import pytest
+from typing import NamedTuple
+from wscodec.encoder.pyencoder.instrumented import InstrumentedSampleTRH
 from wscodec.decoder import decode
 
+INPUT_BASEURL = "plotsensor.com"
+INPUT_SERIAL = 'abcdabcd'
+INPUT_TIMEINT = 12
+INPUT_SECKEY = 'AAAABBBBCCCCDDDD'
+
+
+class EncodedURL(NamedTuple):
+    #: Instrumented encoder that wrote the URL.
+    instr: object
+    #: Samples pushed into the encoder, newest first.
+    inlist: list
+
+    @property
+    def params(self) -> dict:
+        """
+        URL parameters as keyword arguments to decode(), without the secret key. These are read from the encoder
+        each time, so they include samples pushed after the URL was encoded.
+        """
+        par = self.instr.eepromba.get_url_parsedqs()
+        return dict(statb64=par['x'][0], timeintb64=par['t'][0], circb64=par['q'][0], vfmtb64=par['v'][0])
+
 
 @pytest.fixture(scope="function", params=[1, 10, 100, 1000, 1001])
 def instr_sample_populated(instr_sample, request):
@@ -44,4 +68,47 @@ def instr_sample_populated(instr_sample, request):
 
     inlist = inlist[:len(urllist)]
 
-    return {'instr_sample': instr_sample, 'inlist': inlist, 'urllist': urllist}
\ No newline at end of file
+    return {'instr_sample': instr_sample, 'inlist': inlist, 'urllist': urllist}
+
+
+@pytest.fixture(scope="session")
+def encode_url():
+    """
+    Factory that pushes samples into an instrumented encoder and returns the URL it writes.
+
+    Parameters
+    ----------
+    instrclass
+        Instrumented encoder class. Defaults to InstrumentedSampleTRH.
+    n : int
+        Number of samples to push.
+    secretkey : str
+        HMAC key of the encoder.
+    baseurl : str
+        Base URL of the encoder.
+    endstopmins : int
+        Minutes elapsed since the most recent sample, written to the endstop after the samples are pushed.
+        None leaves the endstop as it is.
+    """
+    def encode(instrclass=InstrumentedSampleTRH, n: int = 0, secretkey: str = INPUT_SECKEY,
+               baseurl: str = INPUT_BASEURL, endstopmins: int = None) -> EncodedURL:
+        instr = instrclass(baseurl=baseurl,
+                           serial=INPUT_SERIAL,
+                           secretkey=secretkey,
+                           smplintervalmins=INPUT_TIMEINT)
+        inlist = instr.pushsamples(n)
+        if endstopmins is not None:
+            instr.updateendstop(minutes=endstopmins)
+        return EncodedURL(instr, inlist)
+
+    return encode
+
+
+@pytest.fixture
+def run_async():
+    """
+    Run a coroutine to completion in a new event loop. asyncio.run() is not available before Python 3.7.
+    """
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
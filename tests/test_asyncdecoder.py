@@ -0,0 +1,80 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import asyncio
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from wscodec.decoder import decode, decode_async, AsyncDecoder
+from wscodec.decoder.exceptions import MessageIntegrityError
+
+INPUT_SERIAL = 'abcdabcd'
+INPUT_SECKEY = 'AAAABBBBCCCCDDDD'
+INPUT_SCANTIME = datetime(2021, 3, 1, tzinfo=timezone.utc)
+
+
+async def lookup(serial):
+    return {INPUT_SERIAL: INPUT_SECKEY}.get(serial, "notthekey")
+
+
+def test_decode_async_awaitable_key(encode_url, run_async):
+    params = dict(encode_url(n=30).params, scantimestamp=INPUT_SCANTIME)
+
+    decoded = run_async(decode_async(lookup(INPUT_SERIAL), **params))
+
+    assert decoded._samples is not None
+    assert decoded.get_samples_list() == decode(secretkey=INPUT_SECKEY, **params).get_samples_list()
+
+
+def test_asyncdecoder_concurrency(encode_url, run_async):
+    paramslist = [dict(encode_url(n=n).params, scantimestamp=INPUT_SCANTIME) for n in (1, 2, 3, 50, 100)]
+    decoder = AsyncDecoder(lookup, max_concurrency=2)
+
+    async def decode_all():
+        return await asyncio.gather(*(decoder.decode(INPUT_SERIAL, **params) for params in paramslist))
+
+    results = run_async(decode_all())
+
+    for params, result in zip(paramslist, results):
+        assert result.get_samples_list() == decode(secretkey=INPUT_SECKEY, **params).get_samples_list()
+
+
+def test_asyncdecoder_wrongkey(encode_url, run_async):
+    decoder = AsyncDecoder(lookup)
+
+    with pytest.raises(MessageIntegrityError):
+        run_async(decoder.decode("unknown", scantimestamp=INPUT_SCANTIME, **encode_url(n=10).params))
+
+
+def test_decode_async_process_pool(encode_url, run_async):
+    params = dict(encode_url(n=60).params, scantimestamp=INPUT_SCANTIME)
+
+    with ProcessPoolExecutor(2) as executor:
+        decoded = run_async(decode_async(INPUT_SECKEY, executor=executor, **params))
+        unbuilt = run_async(decode_async(INPUT_SECKEY, executor=executor, buildsamples=False, **params))
+
+    # Samples built in the worker are returned with the decoded object, so they are not built again.
+    assert decoded._samples is not None
+    assert decoded.get_samples_list() == decode(secretkey=INPUT_SECKEY, **params).get_samples_list()
+    assert unbuilt._samples is None
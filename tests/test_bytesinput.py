@@ -0,0 +1,116 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import pytest
+from datetime import datetime, timezone
+from wscodec.encoder.pyencoder.instrumented import InstrumentedSampleTRH, InstrumentedSampleT
+from wscodec.decoder import decode, decode_url, DecodeCache
+from wscodec.decoder.status import Status
+from wscodec.decoder.exceptions import DelimiterNotFoundError
+
+INPUT_SERIAL = 'abcdabcd'
+INPUT_SECKEY = 'AAAABBBBCCCCDDDD'
+INPUT_SCANTIME = datetime(2021, 3, 1, tzinfo=timezone.utc)
+
+BUFFER_TYPES = [bytes, bytearray, memoryview]
+
+
+def tobuffer(buffertype, value: str):
+    return buffertype(value.encode('ascii'))
+
+
+@pytest.fixture(scope="module", params=[(InstrumentedSampleTRH, 60), (InstrumentedSampleT, 190)])
+def encoded(encode_url, request):
+    instrclass, n = request.param
+    return encode_url(instrclass, n)
+
+
+@pytest.mark.parametrize("buffertype", BUFFER_TYPES)
+def test_decode_buffers(encoded, buffertype):
+    params = encoded.params
+    expected = decode(secretkey=INPUT_SECKEY, scantimestamp=INPUT_SCANTIME, **params)
+
+    decoded = decode(secretkey=INPUT_SECKEY, scantimestamp=INPUT_SCANTIME,
+                     **{name: tobuffer(buffertype, value) for name, value in params.items()})
+
+    assert decoded.get_samples_list() == expected.get_samples_list()
+    assert decoded.status.loopcount == expected.status.loopcount
+    assert bytes(decoded.linearbuf) == expected.linearbuf.encode('ascii')
+
+
+@pytest.mark.parametrize("buffertype", BUFFER_TYPES)
+def test_decode_url_buffers(encoded, buffertype):
+    url = encoded.instr.eepromba.get_url()
+    lookups = []
+
+    def lookup(serial):
+        lookups.append(serial)
+        return INPUT_SECKEY
+
+    decoded = decode_url(tobuffer(buffertype, url), lookup, scantimestamp=INPUT_SCANTIME)
+
+    assert lookups == [INPUT_SERIAL.encode('ascii')]
+    assert decoded.get_samples_list() == decode_url(url, INPUT_SECKEY,
+                                                    scantimestamp=INPUT_SCANTIME).get_samples_list()
+
+
+def test_status_buffers():
+    statb64 = 'AAAAAABk'
+
+    assert Status(statb64.encode('ascii')).batv_resetcause == Status(statb64).batv_resetcause
+    assert Status.from_b64(bytearray(statb64, 'ascii')).batv_resetcause == Status(statb64).batv_resetcause
+
+
+def test_cache_buffers(encoded):
+    cache = DecodeCache()
+    params = encoded.params
+    circb64 = params.pop('circb64')
+
+    cache.decode(secretkey=INPUT_SECKEY, circb64=circb64, **params)
+    cache.decode(secretkey=INPUT_SECKEY, circb64=memoryview(circb64.encode('ascii')), **params)
+
+    assert cache.stats()['hits'] == 1
+
+
+def test_delimiter_not_found_bytes(encoded):
+    params = encoded.params
+    params['circb64'] = params['circb64'].replace('~', 'A').encode('ascii')
+
+    with pytest.raises(DelimiterNotFoundError):
+        decode(secretkey=INPUT_SECKEY, **params)
+
+
+def test_decode_copies_bytearray(encoded):
+    params = {name: bytearray(value, 'ascii') for name, value in encoded.params.items()}
+    decoded = decode(secretkey=INPUT_SECKEY, scantimestamp=INPUT_SCANTIME, **params)
+    expected = [vars(sample) for sample in decoded.samples]
+    payloadstr = decoded.payloadstr
+
+    # The caller reuses its receive buffers.
+    for value in params.values():
+        value[:] = b'A' * len(value)
+
+    assert type(decoded.circb64) is bytes
+    assert decoded.payloadstr == payloadstr
+    assert [vars(sample) for sample in decoded.restamp(INPUT_SCANTIME).samples] == expected
@@ -0,0 +1,76 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import pytest
+from datetime import datetime, timezone
+from wscodec.decoder import decode, decode_many
+from wscodec.decoder.exceptions import MessageIntegrityError
+
+INPUT_SECKEY = 'AAAABBBBCCCCDDDD'
+INPUT_SCANTIME = datetime(2021, 3, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture(scope="module")
+def url_params(encode_url):
+    def params(n, secretkey=INPUT_SECKEY):
+        return dict(encode_url(n=n).params, secretkey=secretkey, scantimestamp=INPUT_SCANTIME)
+    return params
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_decode_many(url_params, workers):
+    params = [url_params(n) for n in (1, 20, 300)]
+    params.insert(1, url_params(5, secretkey="notthekey"))
+
+    results = decode_many(params, workers=workers, chunksize=2)
+
+    assert len(results) == len(params)
+    assert isinstance(results[1], MessageIntegrityError)
+
+    for urlparams, result in zip(params[:1] + params[2:], results[:1] + results[2:]):
+        assert result.get_samples_list() == decode(**urlparams).get_samples_list()
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_decode_many_compact_results(url_params, workers):
+    params = [url_params(300)]
+    result, = decode_many(params, workers=workers)
+
+    # Only the serialised form crosses the process boundary, so the URL strings are not sent back. The same is true
+    # in the calling process.
+    assert result.circb64 is None
+    assert result.pairbytes == decode(**params[0]).pairbytes
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_decode_many_usenumpy(url_params, workers):
+    pytest.importorskip("numpy")
+    from wscodec.decoder.pairs import PairArray
+
+    params = [dict(url_params(40), usenumpy=True), url_params(40)]
+    numpyresult, listresult = decode_many(params, workers=workers)
+
+    assert isinstance(numpyresult.pairs, PairArray)
+    assert isinstance(listresult.pairs, list)
+    assert numpyresult.get_samples_list() == listresult.get_samples_list()
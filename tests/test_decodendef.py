@@ -0,0 +1,75 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import pytest
+from datetime import datetime, timezone
+from wscodec.decoder import decode_url, decode_ndef
+from wscodec.decoder.ndefmessage import find_uri
+from wscodec.decoder.exceptions import InvalidNDEFError
+
+INPUT_SERIAL = 'abcdabcd'
+INPUT_SECKEY = 'AAAABBBBCCCCDDDD'
+INPUT_SCANTIME = datetime(2021, 3, 1, tzinfo=timezone.utc)
+#: Byte offset of the NDEF Message TLV in the EEPROM.
+TLV_START = 16
+
+
+@pytest.fixture(scope="module", params=["plotsensor.com", "toastersrg.plotsensor.com"])
+def instr(encode_url, request):
+    return encode_url(n=77, baseurl=request.param).instr
+
+
+def test_find_uri(instr):
+    message = bytes(instr.eepromba.get_message())
+    start, end = find_uri(message)
+
+    assert instr.eepromba.get_url().endswith(message[start:end].decode('ascii'))
+
+
+def test_decode_ndef_record(instr):
+    expected = decode_url(instr.eepromba.get_url(), INPUT_SECKEY, scantimestamp=INPUT_SCANTIME)
+    decoded = decode_ndef(instr.eepromba.get_message(), INPUT_SECKEY, scantimestamp=INPUT_SCANTIME)
+
+    assert decoded.get_samples_list() == expected.get_samples_list()
+
+
+def test_decode_ndef_tlv(instr):
+    tlvs = bytes([0x00, 0x01, 0x03, 0xA0, 0x10, 0x44]) + bytes(instr.eepromba.eepromba[TLV_START:])
+    lookups = []
+
+    def lookup(serial):
+        lookups.append(serial)
+        return INPUT_SECKEY
+
+    decoded = decode_ndef(memoryview(tlvs), lookup, scantimestamp=INPUT_SCANTIME)
+
+    assert lookups == [INPUT_SERIAL.encode('ascii')]
+    assert decoded.npairs == 77
+
+
+@pytest.mark.parametrize("message", [bytes([0x00, 0xFE]), bytes([0xD1, 0x01, 0x05, 0x54, 0x02]),
+                                     bytes([0x03, 0xFF, 0x03])])
+def test_decode_ndef_invalid(message):
+    with pytest.raises(InvalidNDEFError):
+        decode_ndef(message, INPUT_SECKEY)
@@ -0,0 +1,81 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import pytest
+from datetime import datetime, timezone
+from urllib.parse import quote
+from wscodec.decoder import decode, decode_url
+from wscodec.decoder.decoderfactory import extract_params
+from wscodec.decoder.exceptions import MissingParameterError
+
+INPUT_SERIAL = 'abcdabcd'
+INPUT_SECKEY = 'AAAABBBBCCCCDDDD'
+INPUT_SCANTIME = datetime(2021, 3, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture(scope="function")
+def encoded(encode_url):
+    return encode_url(n=50)
+
+
+def test_extract_params(encoded):
+    par = encoded.instr.eepromba.get_url_parsedqs()
+    params = extract_params(encoded.instr.eepromba.get_url())
+
+    assert params.serial == par['s'][0]
+    assert params.statb64 == par['x'][0]
+    assert params.timeintb64 == par['t'][0]
+    assert params.circb64 == par['q'][0]
+    assert params.vfmtb64 == par['v'][0]
+
+
+def test_extract_params_quoted():
+    params = extract_params("https://a.b/?z=1&s={}&x=xx&t=tt&q=qq&v=vv#frag".format(quote('ab/cd', safe='')))
+
+    assert params == ('ab/cd', 'xx', 'tt', 'qq', 'vv')
+
+
+def test_extract_params_missing():
+    with pytest.raises(MissingParameterError) as excinfo:
+        extract_params("https://a.b/?s=abcdabcd&x=xx&t=tt&v=vv")
+
+    assert excinfo.value.parameter == 'q'
+
+
+def test_decode_url(encoded):
+    url = encoded.instr.eepromba.get_url()
+    expected = decode(secretkey=INPUT_SECKEY, scantimestamp=INPUT_SCANTIME, **encoded.params)
+
+    lookups = []
+
+    def lookup(serial):
+        lookups.append(serial)
+        return INPUT_SECKEY
+
+    decoded = decode_url(url, lookup, scantimestamp=INPUT_SCANTIME)
+
+    assert lookups == [INPUT_SERIAL]
+    assert decoded.get_samples_list() == expected.get_samples_list()
+    assert decode_url(url, INPUT_SECKEY, scantimestamp=INPUT_SCANTIME).get_samples_list() == \
+        expected.get_samples_list()
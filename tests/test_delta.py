@@ -0,0 +1,78 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from wscodec.encoder.pyencoder.instrumented import InstrumentedSampleTRH, InstrumentedSampleT
+from wscodec.decoder import decode_delta
+
+INPUT_TIMEINT = 12
+INPUT_SECKEY = 'AAAABBBBCCCCDDDD'
+INPUT_SCANTIME = datetime(2021, 3, 1, tzinfo=timezone.utc)
+
+
+def scan(encoded, pushed, previous):
+    scantimestamp = INPUT_SCANTIME + pushed * timedelta(minutes=INPUT_TIMEINT)
+    return decode_delta(previous, secretkey=INPUT_SECKEY, scantimestamp=scantimestamp, **encoded.params)
+
+
+@pytest.mark.parametrize('instrclass', [InstrumentedSampleTRH, InstrumentedSampleT])
+@pytest.mark.parametrize('steps', [[1, 1, 1, 1], [3, 0, 7, 180], [150, 5, 170, 1], [2, 180, 180, 180]])
+def test_delta(encode_url, instrclass, steps):
+    encoded = encode_url(instrclass, 5)
+    pushed = 5
+    delta = scan(encoded, pushed, None)
+    assert len(delta.samples) == len(encoded.inlist)
+
+    for step in steps:
+        encoded.instr.pushsamples(step)
+        pushed += step
+        delta = scan(encoded, pushed, delta.state)
+
+        assert not delta.gap
+        assert len(delta.samples) == step
+        assert [vars(sample) for sample in delta.samples] == delta.url.get_samples_list()[:step]
+
+
+def test_delta_overflow(encode_url):
+    encoded = encode_url(n=5)
+    delta = scan(encoded, 5, None)
+
+    encoded.instr.pushsamples(400)
+    delta = scan(encoded, 405, delta.state)
+
+    assert delta.gap
+    assert len(delta.samples) == delta.url.npairs
+
+
+def test_delta_reset(encode_url):
+    encoded = encode_url(n=50)
+    delta = scan(encoded, 50, None)
+
+    previous = delta.state._replace(resetsalltime=delta.state.resetsalltime + 1)
+    encoded.instr.pushsamples(2)
+    delta = scan(encoded, 52, previous)
+
+    assert delta.gap
+    assert len(delta.samples) == 52
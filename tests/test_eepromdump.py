@@ -0,0 +1,85 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import pytest
+from datetime import datetime, timezone
+from wscodec.encoder.pyencoder.instrumented import InstrumentedSampleTRH, InstrumentedSampleT
+from wscodec.decoder import decode_url, decode_dump
+from wscodec.decoder.eepromdump import IMAGE_BYTES
+from wscodec.decoder.exceptions import MessageIntegrityError, InvalidNDEFError
+
+INPUT_SECKEY = 'AAAABBBBCCCCDDDD'
+INPUT_SCANTIME = datetime(2021, 3, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture(scope="module")
+def make_image(encode_url):
+    def make(instrclass, n, secretkey=INPUT_SECKEY):
+        instr = encode_url(instrclass, n, secretkey=secretkey).instr
+        image = bytes(instr.eepromba.eepromba)
+        assert len(image) == IMAGE_BYTES
+        return image, instr.eepromba.get_url()
+    return make
+
+
+def test_decode_dump(make_image, tmp_path):
+    images = [make_image(InstrumentedSampleTRH, 5), make_image(InstrumentedSampleT, 190),
+              make_image(InstrumentedSampleTRH, 400, secretkey="anotherkey"), (bytes(IMAGE_BYTES), None)]
+    dumppath = tmp_path / "dump.bin"
+    dumppath.write_bytes(b"".join(image for image, url in images) + bytes(100))
+
+    results = list(decode_dump(dumppath, INPUT_SECKEY, scantimestamp=INPUT_SCANTIME))
+
+    assert [index for index, result in results] == [0, 1, 2, 3]
+    for (image, url), (index, result) in zip(images[:2], results):
+        expected = decode_url(url, INPUT_SECKEY, scantimestamp=INPUT_SCANTIME)
+        assert result.get_samples_list() == expected.get_samples_list()
+    assert isinstance(results[2][1], MessageIntegrityError)
+    assert isinstance(results[3][1], InvalidNDEFError)
+
+    assert [index for index, result in decode_dump(dumppath, INPUT_SECKEY, first=2)] == [2, 3]
+
+
+def test_decode_empty_dump(tmp_path):
+    dumppath = tmp_path / "empty.bin"
+    dumppath.write_bytes(b"")
+
+    assert list(decode_dump(str(dumppath), INPUT_SECKEY)) == []
+
+
+@pytest.mark.parametrize("parameter, corruptbyte", [(b'q=', b'!'), (b'x=', b'!'), (b'x=', b'=')])
+def test_decode_dump_corrupt_image(make_image, tmp_path, parameter, corruptbyte):
+    corrupt, url = make_image(InstrumentedSampleTRH, 50)
+    valuestart = corrupt.index(parameter) + len(parameter)
+    corrupt = corrupt[:valuestart + 1] + corruptbyte + corrupt[valuestart + 2:]
+    good, goodurl = make_image(InstrumentedSampleT, 30)
+    dumppath = tmp_path / "dump.bin"
+    dumppath.write_bytes(corrupt + good)
+
+    results = list(decode_dump(dumppath, INPUT_SECKEY, scantimestamp=INPUT_SCANTIME))
+
+    assert [index for index, result in results] == [0, 1]
+    assert isinstance(results[0][1], Exception)
+    expected = decode_url(goodurl, INPUT_SECKEY, scantimestamp=INPUT_SCANTIME)
+    assert results[1][1].get_samples_list() == expected.get_samples_list()
@@ -0,0 +1,91 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import pytest
+from datetime import datetime, timezone
+from wscodec.encoder.pyencoder.instrumented import InstrumentedSampleTRH, InstrumentedSampleT
+from wscodec.decoder import decode, decode_header
+from wscodec.decoder.exceptions import DelimiterNotFoundError, InvalidCircularBufferError
+
+INPUT_SECKEY = 'AAAABBBBCCCCDDDD'
+
+
+@pytest.mark.parametrize("instrclass", [InstrumentedSampleTRH, InstrumentedSampleT])
+@pytest.mark.parametrize("n", [1, 2, 100, 189, 191, 381])
+def test_header_matches_decode(encode_url, instrclass, n):
+    params = encode_url(instrclass, n, endstopmins=5).params
+    scantimestamp = datetime(2021, 3, 1, tzinfo=timezone.utc)
+    header = decode_header(**params)
+    decoded = decode(secretkey=INPUT_SECKEY, scantimestamp=scantimestamp, **params)
+
+    assert header.npairs == decoded.npairs
+    assert header.elapsedmins == decoded.elapsedmins
+    assert header.endmarkerpos == decoded.endmarkerpos
+    assert header.hash == decoded.hash
+    assert header.loopcount == decoded.status.loopcount
+    assert header.resetsalltime == decoded.status.resetsalltime
+    assert header.batvoltageraw == decoded.status.get_batvoltageraw()
+    assert header.resetcause == decoded.status.resetcause
+    assert header.timeinterval == decoded.timeinterval
+
+    oldest = decoded.samples[-1].timestamp
+    assert scantimestamp - oldest <= header.timespan <= scantimestamp - oldest + decoded.timeinterval
+
+
+def test_header_bytes(encode_url):
+    params = encode_url(InstrumentedSampleTRH, 189, endstopmins=5).params
+    header = decode_header(**{name: value.encode('ascii') for name, value in params.items()})
+    expected = decode_header(**params)
+
+    assert header._replace(status=None) == expected._replace(status=None)
+    assert header.loopcount == expected.loopcount
+
+
+def test_header_no_delimiter(encode_url):
+    params = encode_url(InstrumentedSampleTRH, 10, endstopmins=5).params
+    params['circb64'] = params['circb64'].replace('~', 'A')
+
+    with pytest.raises(DelimiterNotFoundError):
+        decode_header(**params)
+
+
+def test_header_second_delimiter(encode_url):
+    params = encode_url(InstrumentedSampleTRH, 10, endstopmins=5).params
+    params['circb64'] = '~' + params['circb64'][1:]
+
+    with pytest.raises(DelimiterNotFoundError):
+        decode(secretkey=INPUT_SECKEY, **params)
+    with pytest.raises(DelimiterNotFoundError):
+        decode_header(**params)
+
+
+@pytest.mark.parametrize("circb64", [lambda c: c[4:] + c[:4], lambda c: c[c.index('~') - 11:c.index('~') + 1], lambda c: c.replace('~', '!~')[1:]])
+def test_header_malformed_buffer(encode_url, circb64):
+    params = encode_url(InstrumentedSampleTRH, 100, endstopmins=5).params
+    params['circb64'] = circb64(params['circb64'])
+
+    with pytest.raises(InvalidCircularBufferError):
+        decode(secretkey=INPUT_SECKEY, **params)
+    with pytest.raises(InvalidCircularBufferError):
+        decode_header(**params)
@@ -0,0 +1,58 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import subprocess
+import sys
+import pytest
+from wscodec.decoder.decoderfactory import _get_decoderversion
+
+#: Modules that are slow to import and must not be loaded by importing the decoder.
+SLOW_MODULES = ['pkg_resources', 'numpy', 'asyncio', 'concurrent.futures', 'multiprocessing']
+
+
+def imported_modules(statement: str) -> set:
+    script = "import sys; {}; print(' '.join(sys.modules))".format(statement)
+    output = subprocess.check_output([sys.executable, "-c", script], universal_newlines=True)
+    return set(output.split())
+
+
+@pytest.mark.parametrize("module", SLOW_MODULES)
+def test_decoder_import_is_cheap(module):
+    assert module not in imported_modules("import wscodec.decoder")
+
+
+def test_decode_does_not_import_slow_modules(encode_url):
+    params = encode_url(n=10).params
+
+    statement = "from wscodec.decoder import decode; " \
+                "decode(secretkey='AAAABBBBCCCCDDDD', **{!r}).samples".format(params)
+    assert imported_modules(statement).isdisjoint(SLOW_MODULES)
+
+
+def test_decoder_version_cached():
+    _get_decoderversion.cache_clear()
+    _get_decoderversion()
+    _get_decoderversion()
+
+    assert _get_decoderversion.cache_info().hits == 1
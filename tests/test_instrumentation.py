@@ -0,0 +1,93 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import pytest
+from wscodec.decoder import decode
+from wscodec.decoder.instrumentation import collect, Collector
+from wscodec.decoder.exceptions import MessageIntegrityError
+
+INPUT_SECKEY = 'AAAABBBBCCCCDDDD'
+
+DECODE_STAGES = {'decode', 'status', 'linearise', 'b64decode', 'endstop', 'pairs', 'verify'}
+
+
+@pytest.fixture(scope="module")
+def urlparams(encode_url):
+    return dict(encode_url(n=80).params, secretkey=INPUT_SECKEY)
+
+
+def test_stages_recorded(urlparams):
+    with collect() as collector:
+        decoded = decode(**urlparams)
+        decoded.samples
+
+    decoderecord, samplesrecord = collector.records
+    assert set(decoderecord) == DECODE_STAGES
+    assert decoderecord['pairs'][1] == decoded.npairs
+    assert set(samplesrecord) == {'samples'}
+    assert samplesrecord['samples'][1] == len(decoded.samples)
+    assert decoderecord['decode'][0] >= decoderecord['verify'][0]
+
+
+def test_disabled_records_nothing(urlparams):
+    collector = Collector()
+    decode(**urlparams)
+
+    with collect(collector):
+        pass
+    decode(**urlparams)
+
+    assert len(collector.records) == 0
+
+
+def test_summary(urlparams):
+    with collect(Collector(maxrecords=5)) as collector:
+        for i in range(8):
+            decode(**urlparams)
+
+    summary = collector.summary(percentiles=(50, 99))
+
+    assert set(summary) == DECODE_STAGES
+    assert summary['decode']['calls'] == 5
+    assert summary['pairs']['items'] == 80
+    assert summary['decode']['p50'] <= summary['decode']['p99']
+    assert summary['status']['items'] is None
+
+
+def test_failed_decode_recorded(urlparams):
+    with collect() as collector:
+        decode(**urlparams)
+        with pytest.raises(MessageIntegrityError):
+            decode(**dict(urlparams, secretkey="notthekey"))
+
+    okrecord, failedrecord = collector.records
+    assert not okrecord['verify'][2]
+    assert failedrecord['verify'][2]
+    assert failedrecord['decode'][2]
+    assert not failedrecord['pairs'][2]
+
+    summary = collector.summary()
+    assert summary['decode']['calls'] == 2
+    assert summary['decode']['failures'] == 1
+    assert summary['pairs']['failures'] == 0
@@ -0,0 +1,53 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import pytest
+from itertools import islice
+from wscodec.encoder.pyencoder.instrumented import InstrumentedSampleTRH, InstrumentedSampleT
+from wscodec.decoder import decode
+
+INPUT_SECKEY = 'AAAABBBBCCCCDDDD'
+
+
+@pytest.fixture(scope="function", params=[InstrumentedSampleTRH, InstrumentedSampleT])
+def decodedurl(encode_url, request):
+    return decode(secretkey=INPUT_SECKEY, **encode_url(request.param, 57).params)
+
+
+def test_nothing_materialised(decodedurl):
+    assert decodedurl._samples is None
+    assert decodedurl._batch is None
+    assert decodedurl._pairs is None
+
+
+def test_iter_samples_newest_first(decodedurl):
+    newest = list(islice(decodedurl.iter_samples(), 3))
+
+    assert decodedurl._samples is None
+    assert [vars(sample) for sample in newest] == decodedurl.get_samples_list()[:3]
+
+
+def test_samples_cached(decodedurl):
+    assert decodedurl.samples is decodedurl.samples
+    assert list(decodedurl.iter_samples()) == decodedurl.samples
@@ -0,0 +1,84 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import pytest
+from wscodec.decoder import decode
+from wscodec.decoder.b64decode import B64Decoder
+from wscodec.decoder.exceptions import InvalidCircularBufferError
+
+INPUT_SECKEY = 'AAAABBBBCCCCDDDD'
+
+
+@pytest.mark.parametrize('n', [1, 2, 50, 188, 189, 400])
+def test_linearbytes_matches_fragments(encode_url, n):
+    params = encode_url(n=n).params
+    decodedurl = decode(secretkey=INPUT_SECKEY, **params)
+
+    endstopstr = decodedurl.endstopstr.replace('~', '=')
+
+    assert bytes(decodedurl.payloadbytes) == B64Decoder.b64decode(decodedurl.payloadstr)
+    assert decodedurl.linearbytes[decodedurl.payloadlen:] == B64Decoder.b64decode(endstopstr[:-4]) + \
+        B64Decoder.b64decode(endstopstr[-4:])
+
+
+@pytest.mark.parametrize('n', [1, 100, 187, 189, 191, 250, 381])
+def test_linearise_without_copies(encode_url, n):
+    params = encode_url(n=n).params
+    decodedurl = decode(secretkey=INPUT_SECKEY, **params)
+
+    for copy in ('linearbuf', 'payloadstr', 'endstopstr', 'linearbytes', 'payloadbytes'):
+        assert copy not in vars(decodedurl)
+
+    first, second = decodedurl.payload_segments()
+    assert first.obj is second.obj is decodedurl.circbytes
+    assert len(first) + len(second) == decodedurl.payloadlen
+    assert decodedurl.linearbuf.endswith('~')
+    assert len(decodedurl.linearbuf) == len(params['circb64'])
+
+
+@pytest.mark.parametrize('shift', [1, 3, 4, 7])
+def test_misaligned_endstop(encode_url, shift):
+    params = encode_url(n=100).params
+    # Rotate the circular buffer, so the endstop no longer ends a demi.
+    params['circb64'] = params['circb64'][shift:] + params['circb64'][:shift]
+
+    with pytest.raises(InvalidCircularBufferError):
+        decode(secretkey=INPUT_SECKEY, **params)
+
+
+@pytest.mark.parametrize('badchar', ['!', '.', '=', '\u00e9'])
+def test_invalid_character(encode_url, badchar):
+    params = encode_url(n=100).params
+    params['circb64'] = badchar + params['circb64'][1:]
+
+    with pytest.raises(InvalidCircularBufferError):
+        decode(secretkey=INPUT_SECKEY, **params)
+
+
+def test_truncated_buffer(encode_url):
+    params = encode_url(n=100).params
+    params['circb64'] = params['circb64'][:-4]
+
+    with pytest.raises(InvalidCircularBufferError):
+        decode(secretkey=INPUT_SECKEY, **params)
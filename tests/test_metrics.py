@@ -0,0 +1,99 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import pytest
+from wscodec.encoder.pyencoder.instrumented import InstrumentedSampleTRH, InstrumentedSampleT
+from wscodec.decoder import decode, MetricsRegistry, get_registry, set_registry
+from wscodec.decoder.exceptions import MessageIntegrityError
+
+INPUT_SECKEY = 'AAAABBBBCCCCDDDD'
+
+
+@pytest.fixture(scope="function")
+def registry():
+    previous = get_registry()
+    registry = MetricsRegistry()
+    set_registry(registry)
+    yield registry
+    set_registry(previous)
+
+
+@pytest.mark.parametrize("instrclass", [InstrumentedSampleTRH, InstrumentedSampleT])
+@pytest.mark.parametrize("n", [1, 2, 33])
+def test_nsamples(encode_url, instrclass, n):
+    decoded = decode(secretkey=INPUT_SECKEY, **encode_url(instrclass, n).params)
+
+    assert decoded.nsamples == len(decoded.samples) == n
+
+
+def test_nsamples_unwritten_reading(encode_url):
+    decoded = decode(secretkey=INPUT_SECKEY, **encode_url(InstrumentedSampleT, 41).params)
+    # Set reading1 of an older pair to 4095, which is skipped in the same way as an unwritten reading.
+    pairbytes = bytearray(decoded.pairbytes)
+    pairbytes[3 * 5 + 1] = 0xFF
+    pairbytes[3 * 5 + 2] |= 0x0F
+    # Only rd1MSB is 0xFF here, so this reading is still written.
+    pairbytes[3 * 9 + 1] = 0xFF
+    pairbytes[3 * 9 + 2] &= 0xF0
+    decoded.pairbytes = bytes(pairbytes)
+
+    assert decoded.nsamples == len(list(decoded.iter_samples())) == 40
+
+
+def test_disabled_by_default():
+    assert get_registry() is None
+
+
+def test_outcomes_counted(encode_url, registry):
+    decode(secretkey=INPUT_SECKEY, **encode_url(InstrumentedSampleTRH, 30).params)
+    decode(secretkey=INPUT_SECKEY, **encode_url(InstrumentedSampleT, 5).params)
+
+    with pytest.raises(MessageIntegrityError):
+        decode(secretkey="wrongkey", **encode_url(InstrumentedSampleTRH, 30).params)
+
+    assert sum(registry.decodes.values()) == 2
+    assert len(registry.decodes) == 2
+    assert registry.failures == {'MessageIntegrityError': 1}
+    assert registry.latency.count == 3
+    assert registry.samples.count == 2
+    assert registry.samples.sum == 35
+
+
+def test_prometheus_export(encode_url, registry):
+    decode(secretkey=INPUT_SECKEY, **encode_url(InstrumentedSampleTRH, 30).params)
+
+    text = registry.prometheus()
+
+    assert "# TYPE cupl_decodes_total counter" in text
+    assert 'cupl_decode_samples_bucket{le="25"} 0' in text
+    assert 'cupl_decode_samples_bucket{le="50"} 1' in text
+    assert 'cupl_decode_duration_seconds_bucket{le="+Inf"} 1' in text
+    assert "cupl_decode_duration_seconds_count 1" in text
+
+
+def test_metrics_disabled(encode_url, registry):
+    set_registry(None)
+    decode(secretkey=INPUT_SECKEY, **encode_url(InstrumentedSampleTRH, 3).params)
+
+    assert registry.latency.count == 0
@@ -0,0 +1,87 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from wscodec.decoder import decode, DecodeCache
+from wscodec.decoder.exceptions import MessageIntegrityError
+
+INPUT_SECKEY = 'AAAABBBBCCCCDDDD'
+INPUT_SCANTIME = datetime(2021, 3, 1, tzinfo=timezone.utc)
+
+
+def test_cache_hit_restamps(encode_url):
+    cache = DecodeCache()
+    params = encode_url(n=40).params
+
+    cache.decode(secretkey=INPUT_SECKEY, scantimestamp=INPUT_SCANTIME, **params)
+    later = INPUT_SCANTIME + timedelta(minutes=7)
+    cached = cache.decode(secretkey=INPUT_SECKEY, scantimestamp=later, **params)
+
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+    assert cached.get_samples_list() == decode(secretkey=INPUT_SECKEY, scantimestamp=later,
+                                               **params).get_samples_list()
+
+
+def test_cache_key_includes_secretkey(encode_url):
+    cache = DecodeCache()
+    params = encode_url(n=10).params
+
+    cache.decode(secretkey=INPUT_SECKEY, **params)
+
+    with pytest.raises(MessageIntegrityError):
+        cache.decode(secretkey="notthekey", **params)
+
+    assert len(cache) == 1
+
+
+def test_cache_eviction(encode_url):
+    cache = DecodeCache(maxentries=2)
+
+    for n in (1, 2, 3):
+        cache.decode(secretkey=INPUT_SECKEY, **encode_url(n=n).params)
+
+    assert len(cache) == 2
+    assert cache.stats()['evictions'] == 1
+
+
+def test_cache_maxbytes(encode_url):
+    cache = DecodeCache(maxbytes=1)
+
+    cache.decode(secretkey=INPUT_SECKEY, **encode_url(n=5).params)
+
+    assert len(cache) == 0
+    assert cache.stats()['bytes'] == 0
+
+
+def test_cache_ttl(encode_url):
+    cache = DecodeCache(ttl=0)
+    params = encode_url(n=5).params
+
+    cache.decode(secretkey=INPUT_SECKEY, **params)
+    cache.decode(secretkey=INPUT_SECKEY, **params)
+
+    assert cache.stats()['hits'] == 0
+    assert cache.stats()['expirations'] == 1
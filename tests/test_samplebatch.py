@@ -0,0 +1,74 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import pytest
+from wscodec.encoder.pyencoder.instrumented import InstrumentedSampleTRH, InstrumentedSampleT
+from wscodec.decoder import decode
+from wscodec.decoder.samples import epoch_seconds
+
+INPUT_SECKEY = 'AAAABBBBCCCCDDDD'
+
+
+@pytest.fixture(scope="function", params=[InstrumentedSampleTRH, InstrumentedSampleT])
+def decodedurl(encode_url, request):
+    return decode(secretkey=INPUT_SECKEY, **encode_url(request.param, 101).params)
+
+
+def test_batch_rows(decodedurl):
+    batch = decodedurl.get_sample_batch()
+
+    assert len(batch) == len(decodedurl.samples)
+    assert [vars(sample) for sample in batch] == decodedurl.get_samples_list()
+    assert vars(batch[-1]) == vars(decodedurl.samples[-1])
+
+
+def test_batch_columns(decodedurl):
+    batch = decodedurl.get_sample_batch()
+
+    assert list(batch['rawtemp']) == [sample.rawtemp for sample in decodedurl.samples]
+    assert list(batch['temp']) == [sample.temp for sample in decodedurl.samples]
+    assert batch.timestamps == [sample.timestamp for sample in decodedurl.samples]
+
+
+@pytest.mark.parametrize('index', [slice(0, 5), slice(3, 40, 7), slice(-10, None), slice(None, None, -1)])
+def test_batch_slice(decodedurl, index):
+    batch = decodedurl.get_sample_batch()[index]
+
+    assert len(batch) == len(decodedurl.samples[index])
+    assert [vars(sample) for sample in batch] == [vars(sample) for sample in decodedurl.samples[index]]
+
+
+def test_batch_epochs(decodedurl):
+    epochs = decodedurl.get_epochs()
+
+    assert list(epochs) == [epoch_seconds(sample.timestamp) for sample in decodedurl.samples]
+    assert list(decodedurl.batch[3:50:4].epochs()) == list(epochs[3:50:4])
+
+
+def test_batch_datetime64(decodedurl):
+    np = pytest.importorskip("numpy")
+    epochs = decodedurl.get_epochs(datetime64=True)
+
+    assert epochs.dtype == np.dtype('datetime64[s]')
+    assert list(epochs.astype(np.int64)) == list(decodedurl.get_epochs())
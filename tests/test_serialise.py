@@ -0,0 +1,93 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import pickle
+import pytest
+from datetime import datetime, timezone
+from wscodec.encoder.pyencoder.instrumented import InstrumentedSampleTRH, InstrumentedSampleT
+from wscodec.decoder import decode, from_bytes
+from wscodec.decoder.serialise import SERIAL_HEADER
+from wscodec.decoder.exceptions import InvalidFormatError
+
+INPUT_SECKEY = 'AAAABBBBCCCCDDDD'
+
+
+@pytest.fixture(scope="module",
+                params=[(InstrumentedSampleTRH, 1), (InstrumentedSampleTRH, 300), (InstrumentedSampleT, 7),
+                        (InstrumentedSampleT, 250)])
+def urlparams(encode_url, request):
+    instrclass, n = request.param
+    return dict(encode_url(instrclass, n).params, secretkey=INPUT_SECKEY)
+
+
+@pytest.mark.parametrize("scantimestamp", [datetime(2021, 3, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+                                           datetime(2021, 3, 1, 12, 30)])
+def test_roundtrip(urlparams, scantimestamp):
+    decoded = decode(scantimestamp=scantimestamp, **urlparams)
+    serialised = decoded.to_bytes()
+    restored = from_bytes(memoryview(serialised))
+
+    assert len(serialised) == SERIAL_HEADER.size + 3 * decoded.npairs
+    assert len(serialised) < len(pickle.dumps(decoded))
+    assert type(restored) is type(decoded)
+    assert restored.scantimestamp == decoded.scantimestamp
+    assert restored.get_samples_list() == decoded.get_samples_list()
+    assert restored.status.batv_resetcause == decoded.status.batv_resetcause
+    assert restored.statb64 == decoded.statb64
+    assert restored.timeintb64 == decoded.timeintb64
+    assert restored.hash == decoded.hash
+    assert restored.hashtype == decoded.hashtype
+    assert restored.to_bytes() == serialised
+    assert restored.endstopbytes == decoded.endstopbytes
+    assert restored.payload_segments() is None
+    assert restored.restamp(scantimestamp).get_samples_list() == decoded.get_samples_list()
+
+
+@pytest.mark.parametrize("newest", [0, 3, 10])
+def test_roundtrip_window(urlparams, newest):
+    decoded = decode(newest=newest, **urlparams)
+    restored = from_bytes(decoded.to_bytes())
+
+    assert restored.maxsamples == newest
+    assert restored.nsamples == decoded.nsamples
+    assert restored.get_samples_list() == decoded.get_samples_list()
+
+
+def test_subclass(urlparams):
+    decoded = decode(**urlparams)
+    decoded.__class__ = type('SubclassURL', (type(decoded),), {})
+
+    with pytest.raises(InvalidFormatError):
+        decoded.to_bytes()
+
+
+def test_invalid(urlparams):
+    serialised = decode(**urlparams).to_bytes()
+
+    with pytest.raises(ValueError):
+        from_bytes(b'XX' + serialised[2:])
+    with pytest.raises(ValueError):
+        from_bytes(serialised[:-1])
+    with pytest.raises(ValueError):
+        from_bytes(serialised[:10])
@@ -25,6 +25,11 @@
 import pytest
 from wscodec.encoder.pyencoder.instrumented import InstrumentedSampleTRH
 from wscodec.decoder import decode
+from wscodec.decoder.status import Status, decode_status_batch, RESETCAUSE_BITS, SVSH_BIT, WDT_BIT
+from wscodec.decoder.exceptions import InvalidStatusError
+import base64
+import pickle
+import struct
 
 INPUT_SERIAL = 'abcdabcd'
 INPUT_TIMEINT = 12
@@ -108,3 +113,49 @@ def test_batteryvoltage(resetcause, batteryadc):
 
     assert decodedurl.status.get_batvoltageraw() == batteryadc
     assert decodedurl.status.get_resetcauseraw() == resetcause
+
+
+def status_b64(loopcount, resetsalltime, batteryadc, resetcause):
+    statbytes = struct.pack("HHH", loopcount, resetsalltime, (batteryadc << 8) | resetcause)
+    return base64.urlsafe_b64encode(statbytes).decode('ascii')
+
+
+def test_resetcause():
+    status = Status(status_b64(5, 6, 200, SVSH_BIT | WDT_BIT))
+
+    assert status.resetcause == {name: bit in (SVSH_BIT, WDT_BIT) for name, bit in RESETCAUSE_BITS}
+    assert pickle.loads(pickle.dumps(status)).resetcause == status.resetcause
+
+
+def test_status_cache():
+    statb64 = status_b64(1, 2, 3, 4)
+
+    assert Status.from_b64(statb64) is Status.from_b64(statb64)
+    assert Status.from_b64(statb64).loopcount == 1
+
+
+def test_status_batch():
+    fields = [(0, 0, 1, 0), (65535, 3, 254, 0x82), (12, 400, 100, SVSH_BIT)]
+    columns = decode_status_batch(status_b64(*f) for f in fields)
+
+    for i, statb64 in enumerate(status_b64(*f) for f in fields):
+        status = Status(statb64)
+        assert columns.loopcount[i] == status.loopcount
+        assert columns.resetsalltime[i] == status.resetsalltime
+        assert columns.batvoltageraw[i] == status.get_batvoltageraw()
+        assert columns.resetcauseraw[i] == status.get_resetcauseraw()
+
+    assert columns.resetcause('supervisor') == [False, True, True]
+
+
+def test_status_batch_length():
+    with pytest.raises(ValueError):
+        decode_status_batch(['MDAwMDAw', 'MDAw'])
+
+
+@pytest.mark.parametrize("badstatus", ['MDAwMD!w', 'MDAwMD==', 'MDAwMD.w'])
+def test_status_batch_invalid_character(badstatus):
+    with pytest.raises(InvalidStatusError) as excinfo:
+        decode_status_batch(['MDAwMDAw', badstatus, 'MDAwMDAw'])
+
+    assert excinfo.value.index == 1
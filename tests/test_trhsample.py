@@ -28,6 +28,8 @@ from wscodec.decoder import decode
 from wscodec.decoder.exceptions import NoCircularBufferError, DelimiterNotFoundError, InvalidMajorVersionError, \
     InvalidFormatError, MessageIntegrityError
 from wscodec.decoder.status import SVSH_BIT
+from wscodec.decoder.pairs import hmac_cache_info, hmac_cache_clear
+from wscodec.decoder.hdc2021 import TempSample, TempRHSample, TEMP_LUT, RH_LUT
 
 INPUT_SERIAL = 'abcdabcd'
 INPUT_TIMEINT = 12
@@ -239,4 +241,54 @@ def test_error_messageintegrity_wrongalgorithm():
     with pytest.raises(MessageIntegrityError) as excinfo:
         # Attempt to decode the parameters
         decodedurl = decode(secretkey=SECRETKEY, statb64=par['x'][0], timeintb64=par['t'][0],
-                            circb64=par['q'][0], vfmtb64=par['v'][0], usehmac=False)
\ No newline at end of file
+                            circb64=par['q'][0], vfmtb64=par['v'][0], usehmac=False)
+
+def test_hmac_cache():
+    instr = InstrumentedSampleTRH(baseurl=INPUT_BASEURL,
+                                  serial=INPUT_SERIAL,
+                                  secretkey=INPUT_SECKEY,
+                                  smplintervalmins=INPUT_TIMEINT,
+                                  usehmac=True,
+                                  )
+    instr.pushsamples(10)
+    par = instr.eepromba.get_url_parsedqs()
+
+    hmac_cache_clear()
+    for i in range(3):
+        decode(secretkey=INPUT_SECKEY, statb64=par['x'][0], timeintb64=par['t'][0],
+               circb64=par['q'][0], vfmtb64=par['v'][0], usehmac=True)
+
+    cacheinfo = hmac_cache_info()
+    assert cacheinfo.misses == 1
+    assert cacheinfo.hits == 2
+
+
+def test_lookup_tables():
+    assert len(TEMP_LUT) == len(RH_LUT) == 4096
+    for reading in (0, 1, 2048, 4095):
+        assert TEMP_LUT[reading] == TempSample.reading_to_temp(reading)
+        assert RH_LUT[reading] == TempRHSample.reading_to_rh(reading)
+
+
+def test_lookup_tables_numpy():
+    np = pytest.importorskip("numpy")
+    readings = np.array([0, 7, 4095, 7], dtype=np.uint16)
+
+    assert list(TEMP_LUT[readings]) == [TempSample.reading_to_temp(int(r)) for r in readings]
+    assert list(RH_LUT[readings]) == [TempRHSample.reading_to_rh(int(r)) for r in readings]
+
+
+@pytest.mark.parametrize("reading", [-1, 4096])
+def test_lookup_tables_out_of_range(reading):
+    with pytest.raises(ValueError):
+        TEMP_LUT[reading]
+    with pytest.raises(ValueError):
+        TempSample(reading, None)
+
+
+def test_lookup_tables_numpy_scalar():
+    np = pytest.importorskip("numpy")
+    temp = TEMP_LUT[np.int64(5)]
+
+    assert type(temp) is float
+    assert temp == TempSample.reading_to_temp(5)
@@ -0,0 +1,56 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import pytest
+from datetime import datetime, timezone
+from wscodec.encoder.pyencoder.instrumented import InstrumentedSampleTRH, InstrumentedSampleT
+from wscodec.decoder import decode
+from wscodec.decoder.pairs import PairArray
+
+np = pytest.importorskip("numpy")
+
+INPUT_SECKEY = 'AAAABBBBCCCCDDDD'
+
+
+def decode_both(params):
+    kwargs = dict(params, secretkey=INPUT_SECKEY, scantimestamp=datetime.now(timezone.utc))
+    return decode(**kwargs), decode(**kwargs, usenumpy=True)
+
+
+@pytest.mark.parametrize('n', [1, 2, 3, 100, 187, 188, 189, 500])
+@pytest.mark.parametrize('instrclass', [InstrumentedSampleTRH, InstrumentedSampleT])
+def test_usenumpy_matches(encode_url, instrclass, n):
+    pydecoded, npdecoded = decode_both(encode_url(instrclass, n).params)
+
+    assert isinstance(npdecoded.pairs, PairArray)
+    assert [p.readings() for p in npdecoded.pairs] == [p.readings() for p in pydecoded.pairs]
+    assert npdecoded.get_samples_list() == pydecoded.get_samples_list()
+
+
+def test_pairarray_slice(encode_url):
+    pydecoded, npdecoded = decode_both(encode_url(n=10).params)
+
+    assert len(npdecoded.pairs[2:5]) == 3
+    assert npdecoded.pairs[2:5][0].readings() == pydecoded.pairs[2].readings()
+    assert npdecoded.pairs[-1].readings() == pydecoded.pairs[-1].readings()
@@ -0,0 +1,97 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import pytest
+from wscodec.decoder import decode, verify, is_authentic
+from wscodec.decoder.exceptions import MessageIntegrityError, DelimiterNotFoundError, InvalidCircularBufferError
+
+INPUT_SERIAL = 'abcdabcd'
+INPUT_SECKEY = 'AAAABBBBCCCCDDDD'
+
+
+@pytest.fixture(scope="module", params=[1, 90, 400])
+def urlparams(encode_url, request):
+    params = encode_url(n=request.param).params
+    # verify() reads no timestamps.
+    del params['timeintb64']
+    return params
+
+
+def test_verify(urlparams):
+    result = verify(secretkey=INPUT_SECKEY, serial=INPUT_SERIAL, **urlparams)
+    decoded = decode(secretkey=INPUT_SECKEY, timeintb64='DAA.', **urlparams)
+
+    assert result.valid
+    assert result.error is None
+    assert result.serial == INPUT_SERIAL
+    assert result.hash == decoded.hash
+    assert result.npairs == decoded.npairs
+    assert result.loopcount == decoded.status.loopcount
+    assert result.endmarkerpos == decoded.endmarkerpos
+    assert is_authentic(secretkey=INPUT_SECKEY, **urlparams)
+
+
+def test_verify_wrong_key(urlparams):
+    result = verify(secretkey="wrongkey", **urlparams)
+
+    assert not result.valid
+    assert isinstance(result.error, MessageIntegrityError)
+    assert result.npairs is not None
+    assert not is_authentic(secretkey="wrongkey", **urlparams)
+
+
+def test_verify_no_delimiter(urlparams):
+    circb64 = urlparams['circb64'].replace('~', 'A')
+    result = verify(secretkey=INPUT_SECKEY, statb64=urlparams['statb64'], circb64=circb64,
+                    vfmtb64=urlparams['vfmtb64'])
+
+    assert not result.valid
+    assert isinstance(result.error, DelimiterNotFoundError)
+    assert result.hash is None
+
+
+@pytest.mark.parametrize("shift", [3, 4])
+def test_verify_misaligned(urlparams, shift):
+    circb64 = urlparams['circb64'][shift:] + urlparams['circb64'][:shift]
+    result = verify(secretkey=INPUT_SECKEY, **dict(urlparams, circb64=circb64))
+
+    assert not result.valid
+    assert isinstance(result.error, InvalidCircularBufferError)
+
+
+@pytest.mark.parametrize("badchar", ['!', '.', '\u00e9'])
+def test_verify_invalid_character(urlparams, badchar):
+    circb64 = badchar + urlparams['circb64'][1:]
+    result = verify(secretkey=INPUT_SECKEY, **dict(urlparams, circb64=circb64))
+
+    assert not result.valid
+    assert isinstance(result.error, InvalidCircularBufferError)
+
+
+@pytest.mark.parametrize("parameter, value", [('statb64', 'AAA!'), ('statb64', 'AAAA'), ('vfmtb64', 'A')])
+def test_verify_malformed_parameter(urlparams, parameter, value):
+    result = verify(secretkey=INPUT_SECKEY, **dict(urlparams, **{parameter: value}))
+
+    assert not result.valid
+    assert result.error is not None
@@ -0,0 +1,174 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+import pytest
+from datetime import datetime, timedelta, timezone
+from wscodec.encoder.pyencoder.instrumented import InstrumentedSampleTRH, InstrumentedSampleT
+from wscodec.decoder import decode, decode_async, AsyncDecoder, DecodeCache, decode_ndef, decode_dump
+
+INPUT_SERIAL = 'abcdabcd'
+INPUT_SECKEY = 'AAAABBBBCCCCDDDD'
+SCANTIMESTAMP = datetime(2021, 3, 1, tzinfo=timezone.utc)
+
+
+def decode_window(params, **kwargs):
+    return decode(secretkey=INPUT_SECKEY, scantimestamp=SCANTIMESTAMP, **params, **kwargs)
+
+
+def assert_window(windowed, expected):
+    assert windowed.get_samples_list() == [vars(sample) for sample in expected]
+    assert windowed.nsamples == len(expected)
+    assert [vars(sample) for pairsamples in windowed.iter_pair_samples() for sample in pairsamples] == \
+           [vars(sample) for sample in expected]
+
+    batch = windowed.batch
+    assert list(batch['rawtemp']) == [sample.rawtemp for sample in expected]
+    assert list(batch['temp']) == [sample.temp for sample in expected]
+    assert list(batch.timestamps) == [sample.timestamp for sample in expected]
+
+
+@pytest.mark.parametrize("instrclass", [InstrumentedSampleTRH, InstrumentedSampleT])
+@pytest.mark.parametrize("n", [1, 2, 3, 100, 189, 191, 381])
+@pytest.mark.parametrize("newest", [0, 1, 2, 3, 4, 51, 1000])
+def test_newest(encode_url, instrclass, n, newest):
+    params = encode_url(instrclass, n, endstopmins=5).params
+    full = decode_window(params)
+
+    assert_window(decode_window(params, newest=newest), full.samples[:newest])
+
+
+@pytest.mark.parametrize("instrclass", [InstrumentedSampleTRH, InstrumentedSampleT])
+@pytest.mark.parametrize("n", [1, 2, 3, 100, 191])
+def test_since(encode_url, instrclass, n):
+    params = encode_url(instrclass, n, endstopmins=5).params
+    full = decode_window(params)
+
+    for index, sample in enumerate(full.samples):
+        # A sample timestamped exactly at since is inside the window.
+        assert_window(decode_window(params, since=sample.timestamp), full.samples[:index + 1])
+        assert_window(decode_window(params, since=sample.timestamp + timedelta(seconds=1)), full.samples[:index])
+
+    assert_window(decode_window(params, since=SCANTIMESTAMP), [])
+    assert_window(decode_window(params, since=SCANTIMESTAMP - timedelta(days=365)), full.samples)
+
+
+@pytest.mark.parametrize("instrclass", [InstrumentedSampleTRH, InstrumentedSampleT])
+def test_newest_and_since(encode_url, instrclass):
+    params = encode_url(instrclass, 101, endstopmins=5).params
+    full = decode_window(params)
+    since = full.samples[20].timestamp
+
+    assert_window(decode_window(params, newest=5, since=since), full.samples[:5])
+    assert_window(decode_window(params, newest=50, since=since), full.samples[:21])
+
+
+@pytest.mark.parametrize("instrclass", [InstrumentedSampleTRH, InstrumentedSampleT])
+@pytest.mark.parametrize("n", [1, 191])
+def test_newest_numpy(encode_url, instrclass, n):
+    pytest.importorskip("numpy")
+    params = encode_url(instrclass, n, endstopmins=5).params
+    full = decode_window(params)
+
+    for newest in [0, 1, 2, 3, 50]:
+        assert_window(decode_window(params, newest=newest, usenumpy=True), full.samples[:newest])
+
+
+def test_newest_restamp(encode_url):
+    params = encode_url(InstrumentedSampleT, 55, endstopmins=5).params
+    windowed = decode_window(params, newest=7)
+    restamped = windowed.restamp(SCANTIMESTAMP + timedelta(hours=1))
+
+    assert restamped.nsamples == 7
+    assert [sample.timestamp for sample in restamped.samples] == \
+           [sample.timestamp + timedelta(hours=1) for sample in windowed.samples]
+
+
+def test_newest_negative(encode_url):
+    with pytest.raises(ValueError):
+        decode_window(encode_url(InstrumentedSampleTRH, 10, endstopmins=5).params, newest=-1)
+
+
+def test_window_async(encode_url, run_async):
+    params = encode_url(InstrumentedSampleT, 91, endstopmins=5).params
+    full = decode_window(params)
+
+    async def lookup(serial):
+        return INPUT_SECKEY
+
+    async def decode_both():
+        decoded = await decode_async(INPUT_SECKEY, scantimestamp=SCANTIMESTAMP, newest=4, **params)
+        decoder = AsyncDecoder(lookup)
+        since = full.samples[9].timestamp
+        return decoded, await decoder.decode(INPUT_SERIAL, scantimestamp=SCANTIMESTAMP, since=since, **params)
+
+    decoded, decodedsince = run_async(decode_both())
+    assert_window(decoded, full.samples[:4])
+    assert_window(decodedsince, full.samples[:10])
+
+
+def test_window_cache(encode_url):
+    params = encode_url(InstrumentedSampleTRH, 60, endstopmins=5).params
+    full = decode_window(params)
+    cache = DecodeCache()
+
+    assert_window(cache.decode(INPUT_SECKEY, scantimestamp=SCANTIMESTAMP, newest=3, **params), full.samples[:3])
+    # A hit with a different window uses the same entry.
+    assert_window(cache.decode(INPUT_SECKEY, scantimestamp=SCANTIMESTAMP, **params), full.samples)
+    assert_window(cache.decode(INPUT_SECKEY, scantimestamp=SCANTIMESTAMP, newest=7, **params), full.samples[:7])
+
+    # The since window is applied to the restamped timestamps.
+    later = SCANTIMESTAMP + 5 * full.timeinterval
+    restamped = full.restamp(later)
+    since = full.samples[10].timestamp
+    assert_window(cache.decode(INPUT_SECKEY, scantimestamp=later, since=since, **params),
+                  [sample for sample in restamped.samples if sample.timestamp >= since])
+    assert cache.stats()['hits'] == 3
+    assert len(cache) == 1
+
+
+def test_window_ndef(encode_url):
+    instr = encode_url(InstrumentedSampleTRH, 77, endstopmins=5).instr
+    full = decode_ndef(instr.eepromba.get_message(), INPUT_SECKEY, scantimestamp=SCANTIMESTAMP)
+    decoded = decode_ndef(instr.eepromba.get_message(), INPUT_SECKEY, scantimestamp=SCANTIMESTAMP, newest=12)
+
+    assert_window(decoded, full.samples[:12])
+
+
+def test_window_dump(encode_url, tmp_path):
+    instr = encode_url(InstrumentedSampleT, 150, endstopmins=5).instr
+    dumppath = tmp_path / "dump.bin"
+    dumppath.write_bytes(bytes(instr.eepromba.eepromba))
+    full = decode_ndef(instr.eepromba.get_message(), INPUT_SECKEY, scantimestamp=SCANTIMESTAMP)
+
+    (index, decoded), = decode_dump(dumppath, INPUT_SECKEY, scantimestamp=SCANTIMESTAMP, newest=5)
+    assert_window(decoded, full.samples[:5])
+
+
+def test_with_window(encode_url):
+    params = encode_url(InstrumentedSampleT, 33, endstopmins=5).params
+    windowed = decode_window(params, newest=2)
+    full = decode_window(params)
+
+    assert_window(windowed.with_window(newest=10), full.samples[:10])
+    assert_window(windowed.with_window(), full.samples)
+    assert windowed.nsamples == 2
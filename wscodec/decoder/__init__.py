@@ -22,6 +22,16 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 
-from .decoderfactory import decode
+from .decoderfactory import decode, decode_url
+from .parallel import decode_many
+from .asyncdecoder import decode_async, AsyncDecoder
+from .delta import decode_delta, ScanState
+from .resultcache import DecodeCache
+from .verify import verify, is_authentic
+from .serialise import from_bytes
+from .ndefmessage import decode_ndef
+from .eepromdump import decode_dump
+from .header import decode_header
+from .metrics import MetricsRegistry, get_registry, set_registry
 
 name = "urldecoder"
@@ -0,0 +1,154 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+from datetime import datetime
+from functools import partial
+from typing import TYPE_CHECKING, Awaitable, Callable, Union
+from .decoderfactory import decode
+from .samples import SamplesURL
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+
+async def decode_async(secretkey: Union[str, Awaitable[str]],
+                       statb64: str,
+                       timeintb64: str,
+                       circb64: str,
+                       vfmtb64: str,
+                       usehmac: bool = True,
+                       scantimestamp: datetime = None,
+                       usenumpy: bool = False,
+                       executor: 'Executor' = None,
+                       buildsamples: bool = True,
+                       newest: int = None,
+                       since: datetime = None) -> SamplesURL:
+    """
+    Decode a URL without blocking the event loop. The secret key is awaited first if necessary. Then :func:`decode`
+    runs in an executor, so base64 decoding, hash verification and sample building all take place off the event loop.
+
+    Parameters
+    -----------
+    secretkey: str or Awaitable[str]
+        HMAC secret key, or an awaitable that returns it (for example, a database lookup coroutine).
+
+    statb64, timeintb64, circb64, vfmtb64, usehmac, scantimestamp, usenumpy:
+        As for :func:`decode`.
+
+    executor: Executor
+        Executor that decoding runs in. Defaults to the event loop default executor. Use a ProcessPoolExecutor to
+        decode on several cores. Then the decoded object and its samples are pickled to return them to the event
+        loop, which takes longer than decoding in a thread.
+
+    buildsamples: bool
+        True to create the list of samples in the executor. Otherwise it will be created on first access, which may
+        be in the event loop.
+
+    newest, since:
+        As for :func:`decode`. Only samples inside the window are created in the executor.
+
+    Returns
+    --------
+    SamplesURL
+        An object containing a list of timestamped environmental sensor samples.
+
+    """
+    # asyncio is imported here rather than with the decoder. It has already been imported by the running event loop.
+    import asyncio
+    import inspect
+
+    if inspect.isawaitable(secretkey):
+        secretkey = await secretkey
+
+    loop = asyncio.get_event_loop()
+    decodefunc = partial(_decode_and_build, buildsamples, secretkey=secretkey, statb64=statb64, timeintb64=timeintb64,
+                         circb64=circb64, vfmtb64=vfmtb64, usehmac=usehmac, scantimestamp=scantimestamp,
+                         usenumpy=usenumpy, newest=newest, since=since)
+    decoded, samples = await loop.run_in_executor(executor, decodefunc)
+    if samples is not None and decoded._samples is None:
+        # The samples were left out when the decoded object was pickled by a process pool, so they are put back
+        # instead of being created again in the event loop.
+        decoded._samples = samples
+    return decoded
+
+
+class AsyncDecoder:
+    """
+    Decode URLs from an asyncio application, with a limit on the number of decodes in progress at once.
+
+    When the limit is reached, further calls to :meth:`decode` wait their turn. This stops a burst of scans from
+    queueing an unbounded amount of work on the executor.
+
+    Parameters
+    ----------
+    secretkey_lookup : Callable[[str], Awaitable[str]]
+        Coroutine function that returns the HMAC secret key for a tag serial.
+    max_concurrency : int
+        Maximum number of decodes in progress at once.
+    executor : Executor
+        Executor that decoding runs in. Defaults to the event loop default executor.
+    buildsamples : bool
+        True to create the list of samples in the executor.
+    """
+    def __init__(self, secretkey_lookup: Callable[[str], Awaitable[str]], max_concurrency: int = 8,
+                 executor: 'Executor' = None, buildsamples: bool = True):
+        self.secretkey_lookup = secretkey_lookup
+        self.max_concurrency = max_concurrency
+        self.executor = executor
+        self.buildsamples = buildsamples
+        # The semaphore is created inside the running event loop on first use.
+        self._semaphore = None
+
+    async def decode(self, serial: str, **kwargs) -> SamplesURL:
+        """
+        Look up the secret key for a tag and decode one of its URLs.
+
+        Parameters
+        ----------
+        serial : str
+            Tag serial. This is passed to secretkey_lookup.
+        **kwargs
+            Keyword arguments for :func:`decode_async`, excluding secretkey.
+
+        Returns
+        -------
+        SamplesURL
+            An object containing a list of timestamped environmental sensor samples.
+        """
+        if self._semaphore is None:
+            import asyncio
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._semaphore:
+            kwargs.setdefault('executor', self.executor)
+            kwargs.setdefault('buildsamples', self.buildsamples)
+            return await decode_async(self.secretkey_lookup(serial), **kwargs)
+
+
+def _decode_and_build(buildsamples: bool, **kwargs) -> tuple:
+    decoded = decode(**kwargs)
+    # Accessing samples creates and caches the list. It is returned separately, because pickling the decoded object
+    # leaves it out.
+    samples = decoded.samples if buildsamples else None
+    return decoded, samples
@@ -23,6 +23,8 @@
 #
 
 import base64
+import binascii
+from functools import lru_cache
 
 
 class B64Decoder:
@@ -32,5 +34,77 @@ class B64Decoder:
     @classmethod
     def b64decode(cls, b64string):
         # Replace padding byte with RFC3548
-        b64string = b64string.replace(cls.URLSAFE_PADDING_BYTE, cls.RFC3548_PADDING_BYTE)
-        return base64.urlsafe_b64decode(b64string)
\ No newline at end of file
+        if isinstance(b64string, str):
+            b64string = b64string.replace(cls.URLSAFE_PADDING_BYTE, cls.RFC3548_PADDING_BYTE)
+        else:
+            b64string = bytes(b64string).replace(cls.URLSAFE_PADDING_BYTE.encode('ascii'),
+                                                 cls.RFC3548_PADDING_BYTE.encode('ascii'))
+        return base64.urlsafe_b64decode(b64string)
+
+    @classmethod
+    def b64decode_buffer(cls, b64string: str, paddingbyte: str, replacement: str = RFC3548_PADDING_BYTE) -> bytes:
+        """
+        Decode a long base64 string with a single call to the decoder.
+
+        The URL safe alphabet is translated to RFC3548 and paddingbyte is replaced in the same pass that converts the
+        string to bytes. This avoids any intermediate strings.
+
+        Parameters
+        ----------
+        b64string : str or bytes-like object
+            URL safe base64 string. ASCII bytes are translated without being converted to a string.
+        paddingbyte : str
+            A character that marks padding in b64string instead of '='.
+        replacement : str
+            The character that paddingbyte is replaced with. Replace it with 'A' to decode it as zero bits instead
+            of padding.
+
+        Returns
+        -------
+        The decoded bytes.
+        """
+        translation = _translation(paddingbyte, replacement)
+        return binascii.a2b_base64(to_ascii_bytes(b64string).translate(translation))
+
+
+def to_ascii_bytes(b64string) -> bytes:
+    """
+
+    Parameters
+    ----------
+    b64string : str or bytes-like object
+        A string of ASCII characters.
+
+    Returns
+    -------
+    The characters as bytes or bytearray. Bytes and bytearray inputs are returned without being copied.
+    """
+    if isinstance(b64string, str):
+        return b64string.encode('ascii')
+    if isinstance(b64string, (bytes, bytearray)):
+        return b64string
+    return bytes(b64string)
+
+
+def immutable(value):
+    """
+    A decoder keeps its URL parameters, so a caller that reuses a mutable buffer must not be able to change them.
+
+    Parameters
+    ----------
+    value : str or bytes-like object
+        A URL parameter value.
+
+    Returns
+    -------
+    The value itself if it is a str or bytes. Otherwise a bytes copy of it.
+    """
+    if value is None or isinstance(value, (str, bytes)):
+        return value
+    return bytes(value)
+
+
+@lru_cache(maxsize=None)
+def _translation(paddingbyte: str, replacement: str) -> bytes:
+    return bytes.maketrans(b'-_' + paddingbyte.encode('ascii'),
+                           b'+/' + replacement.encode('ascii'))
@@ -22,10 +22,19 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 
-from .b64decode import B64Decoder
+from .b64decode import B64Decoder, immutable
 from .status import Status
-from .exceptions import DelimiterNotFoundError, NoCircularBufferError
+from .exceptions import DelimiterNotFoundError, NoCircularBufferError, InvalidCircularBufferError
 from struct import unpack
+from .instrumentation import instrumented
+import binascii
+
+B64_BLOCK_LEN = 4           #: Number of base64 characters that decode to a whole number of bytes.
+B64_DEMI_LEN = 8            #: Number of base64 characters in each demi.
+BYTES_PER_B64_BLOCK = 3     #: Number of bytes decoded from each base64 block.
+ENDSTOP_HASHN_BYTES = 9     #: Length of the decoded endstop hash and npairs fields in bytes.
+ENDSTOP_ELAPSED_BYTES = 2   #: Length of the decoded endstop elapsed minutes field in bytes.
+ENDSTOP_DECODED_BYTES = 12  #: Number of bytes decoded from the endstop, when the endstop byte is decoded as zero.
 
 
 class CircularBufferURL:
@@ -47,14 +56,18 @@ class CircularBufferURL:
     samples in the payload. This is preceded by the payload string, which contains a list base64-encocded
     environmental sensor readings. These are in chronological order oldest-to-newest reading left-to-right.
 
-    The decoding of the payload string is handled elsewhere.
+    The buffer is not copied to linearise it. The whole circular buffer is base64 decoded with one call into
+    :attr:`circbytes`. The end of the endstop is also the end of a demi, so each base64 block decodes to the same
+    bytes in either order. The linearised buffer is then read through offsets into :attr:`circbytes`, with
+    wraparound. The endstop fields are read from fixed offsets. The decoding of the payload bytes is handled elsewhere.
 
     Parameters
         ----------
         statb64 : str
             Base64 encoded status string extract from a URL parameter.
-        circb64 : str
-            A long string containing base64 encoded samples that are organised as a circular buffer.
+        circb64 : str or bytes-like object
+            A long string containing base64 encoded samples that are organised as a circular buffer. ASCII bytes
+            are decoded without being converted to a string.
 
     """
     ELAPSED_LEN_BYTES = 4   #: Length of the endstop elapsed minutes field in bytes (including the endstop itself).
@@ -62,75 +75,297 @@ class CircularBufferURL:
     ENDSTOP_BYTE = '~'      #: The last character in the endstop and the end of the circular buffer. Must be URL safe.
 
     def __init__(self, statb64: str, circb64: str = None):
-        self.statb64 = statb64
-        self.circb64 = circb64
+        # A bytearray or memoryview is copied once. Then the caller can reuse it and a memoryview can be searched.
+        self.statb64 = immutable(statb64)
+        self.circb64 = immutable(circb64)
 
         self._decode_status()
         self._linearise()
+        self._decode_linearbuf()
+        self._decode_endstop()
 
-        # Separate the buffer endstop from the payload
-        self.endstopstr = self.linearbuf[-self.ENDSTOP_LEN_BYTES:]
-        self.payloadstr = self.linearbuf[:-self.ENDSTOP_LEN_BYTES]
+    @classmethod
+    def from_fields(cls, **kwargs):
+        """
+        Create an object from fields that have already been decoded and verified, without a circular buffer. Nothing
+        is base64 decoded or hashed. The circular buffer attributes are None.
 
-        self._decode_endstop()
+        Parameters
+        ----------
+        **kwargs
+            Keyword arguments of :meth:`_restore` for this class and its parents.
+
+        Returns
+        -------
+        A new object of this class.
+        """
+        restored = cls.__new__(cls)
+        restored._restore(**kwargs)
+        return restored
+
+    def _restore(self, statb64: str, endmarkerpos: int, npairs: int, elapsedmins: int, hash: str):
+        """
+        Set every attribute that is set by the constructor. A child class over-rides this to set its own attributes.
 
+        Parameters
+        ----------
+        statb64 : str
+            Base64 encoded status string.
+        endmarkerpos : int
+            Position of the endstop marker in the circular buffer.
+        npairs : int
+            The number of valid pairs.
+        elapsedmins : int
+            Minutes elapsed since the newest sample.
+        hash : str
+            The hash fragment from the endstop as a hex string.
+        """
+        self.statb64 = immutable(statb64)
+        self.circb64 = None
+        self.circbytes = None
+        self.linearstart = None
+        self.payloadlen = None
+        self.endmarkerpos = endmarkerpos
+        self.npairs = npairs
+        self.elapsedmins = elapsedmins
+        self.hash = hash
+        self._decode_status()
+
+    @instrumented('linearise')
     def _linearise(self):
         """
         Linearise the circular buffer.
 
         The circular buffer is made linear by concatenating the two parts of the buffer
-        either side of the end stop.
+        either side of the end stop. Only the position of the end stop is found here. Nothing is concatenated.
+        """
+
+        self.endmarkerpos = find_endstop(self.circb64, self.status)
+
+    @instrumented('status')
+    def _decode_status(self):
+        """
+        Instantiate a Status object, or reuse one decoded from the same string. This can be over-ridden by a child
+        of this class if the Status data needs to change in future.
         """
+        self.status = Status.from_b64(self.statb64)
 
-        if len(self.circb64) == 0:
-            raise NoCircularBufferError(self.status)
+    @instrumented('b64decode', count=lambda self, _: len(self.circbytes))
+    def _decode_linearbuf(self):
+        """
+        Base64 decode the circular buffer with one call into :attr:`circbytes`. The endstop byte is decoded as zero
+        bits. Its block then decodes to 3 bytes instead of 2, so the last byte is ignored.
 
-        # Split query string at the end of the endstop marker.
-        splitend = self.circb64.split(self.ENDSTOP_BYTE)
+        The linearised buffer starts at byte :attr:`linearstart` of :attr:`circbytes` and wraps around its end.
+        """
+        self.circbytes = decode_buffer(self.circb64)
 
-        if len(splitend) != 2:
-            raise DelimiterNotFoundError(self.circb64, self.status)
+        # find_endstop has checked that the endstop ends on a block boundary.
+        linearstart = (self.endmarkerpos + 1) % len(self.circb64)
+        self.linearstart = linearstart // B64_BLOCK_LEN * BYTES_PER_B64_BLOCK
+        self.payloadlen = len(self.circbytes) - ENDSTOP_DECODED_BYTES
 
-        circbufstart = splitend[1]
-        circbufend = splitend[0]
+    def payload_segments(self) -> tuple:
+        """
+        The decoded payload in linear order is the first segment followed by the second. Either can be empty.
 
-        self.endmarkerpos = len(circbufend)
-        self.linearbuf = circbufstart + circbufend + self.ENDSTOP_BYTE
+        Returns
+        -------
+        Two memoryview objects of :attr:`circbytes`, so no bytes are copied. None if there is no circular buffer,
+        because the object was created by :meth:`from_fields`.
+        """
+        if self.circbytes is None:
+            return None
+        circbytes = memoryview(self.circbytes)
+        firstend = min(len(circbytes), self.linearstart + self.payloadlen)
+        return circbytes[self.linearstart:firstend], circbytes[:max(0, self.linearstart - ENDSTOP_DECODED_BYTES)]
 
-    def _decode_status(self):
+    @property
+    def endstopbytes(self) -> bytes:
         """
-        Instantiate a Status object. This can be over-ridden by a child of this class
-        if the Status data needs to change in future.
+        The decoded endstop: hash, number of pairs and elapsed minutes.
         """
-        self.status = Status(self.statb64)
+        if self.circbytes is None:
+            # The endstop is packed again from its fields.
+            return bytes.fromhex(self.hash) + self.npairs.to_bytes(2, byteorder='big') + \
+                self.elapsedmins.to_bytes(ENDSTOP_ELAPSED_BYTES, byteorder='little')
+        endstopstart = self.linearstart - ENDSTOP_DECODED_BYTES
+        if endstopstart >= 0:
+            endstop = self.circbytes[endstopstart:self.linearstart]
+        else:
+            # The endstop wraps around the end of the circular buffer.
+            endstop = self.circbytes[endstopstart:] + self.circbytes[:self.linearstart]
+        return endstop[:ENDSTOP_HASHN_BYTES + ENDSTOP_ELAPSED_BYTES]
 
+    @property
+    def linearbuf(self) -> str:
+        """
+        The linearised buffer string, with the oldest data first and the endstop last. This is a copy of
+        :attr:`circb64` with the same type. It is only created when accessed.
+        """
+        if self.circb64 is None:
+            return None
+        return self.circb64[self.endmarkerpos + 1:] + self.circb64[:self.endmarkerpos + 1]
+
+    @property
+    def endstopstr(self) -> str:
+        """
+        The endstop string, including the endstop byte.
+        """
+        linearbuf = self.linearbuf
+        return None if linearbuf is None else linearbuf[-self.ENDSTOP_LEN_BYTES:]
+
+    @property
+    def payloadstr(self) -> str:
+        """
+        The base64 encoded payload of the linearised buffer.
+        """
+        linearbuf = self.linearbuf
+        return None if linearbuf is None else linearbuf[:-self.ENDSTOP_LEN_BYTES]
+
+    @property
+    def payloadbytes(self) -> bytes:
+        """
+        The decoded payload in linear order. This is a copy of the payload segments. It is only created when
+        accessed.
+        """
+        if self.circb64 is None:
+            return None
+        return b''.join(self.payload_segments())
+
+    @property
+    def linearbytes(self) -> bytes:
+        """
+        The decoded payload followed by the decoded endstop. It is only created when accessed.
+        """
+        if self.circb64 is None:
+            return None
+        return self.payloadbytes + self.endstopbytes
+
+    @instrumented('endstop')
     def _decode_endstop(self):
         """
         Decode the circular buffer endstop. This can be over-ridden by a child of this class
         if the endstop data needs to change in future.
         """
-        endstopstr = self.endstopstr
+        self.hash, self.npairs, self.elapsedmins = unpack_endstop(self.endstopbytes)
 
-        assert len(endstopstr) == self.ENDSTOP_LEN_BYTES
 
-        endstopstr = endstopstr.replace(self.ENDSTOP_BYTE, B64Decoder.RFC3548_PADDING_BYTE)
+def find_endstop(circb64, status: Status) -> int:
+    """
+    Find the endstop marker and check that the circular buffer is made of whole demis, with the endstop at the end
+    of one.
+
+    Parameters
+    ----------
+    circb64 : str or bytes
+        The circular buffer URL parameter.
+    status : Status
+        Decoded status parameter. This is included in any error raised.
 
-        # Extract elapsed minutes since the previous sample in minutes xxx~. Replace the '=' to make this valid base64.
-        elapsedb64 = endstopstr[-self.ELAPSED_LEN_BYTES:]
-        # The remaining 12 bytes contain the MD5 hash and the number of valid pairs
-        hashnb64 = endstopstr[:-self.ELAPSED_LEN_BYTES]
+    Returns
+    -------
+    The position of the endstop marker in circb64.
 
-        # Decode elapsedb64
-        elapsedbytes = B64Decoder.b64decode(elapsedb64)
-        # Decode hashnb64
-        hashn = B64Decoder.b64decode(hashnb64)
+    Raises
+    ------
+    NoCircularBufferError
+        If circb64 is empty.
+    DelimiterNotFoundError
+        If circb64 does not contain exactly one endstop marker.
+    InvalidCircularBufferError
+        If circb64 is not a whole number of demis long or the endstop marker is not at the end of a demi.
+    """
+    if len(circb64) == 0:
+        raise NoCircularBufferError(status)
 
-        # Extract the number of samples and the HMAC/MD5 checksum from the endstop.
-        npairsbytes = hashn[7:9]
-        hashbytes = hashn[0:7]
+    # There must be exactly one endstop marker.
+    endstopbyte = CircularBufferURL.ENDSTOP_BYTE
+    if not isinstance(circb64, str):
+        endstopbyte = endstopbyte.encode('ascii')
+    endmarkerpos = circb64.find(endstopbyte)
 
-        self.elapsedmins = int.from_bytes(elapsedbytes, byteorder='little')
-        self.npairs = unpack(">H", npairsbytes)[0]
-        self.hash = hashbytes.hex()
+    if endmarkerpos == -1 or circb64.find(endstopbyte, endmarkerpos + 1) != -1:
+        raise DelimiterNotFoundError(circb64, status)
+
+    if len(circb64) % B64_DEMI_LEN != 0 or len(circb64) < CircularBufferURL.ENDSTOP_LEN_BYTES:
+        raise InvalidCircularBufferError(circb64, "its length {} is not a whole number of demis".format(len(circb64)))
+
+    if (endmarkerpos + 1) % B64_DEMI_LEN != 0:
+        raise InvalidCircularBufferError(circb64, "the endstop marker at {} is not at the end of a demi".format(
+            endmarkerpos))
+
+    return endmarkerpos
+
+
+def decode_endstop(circb64, endmarkerpos: int) -> bytes:
+    """
+    Decode only the endstop, without the rest of the circular buffer.
+
+    Parameters
+    ----------
+    circb64 : str or bytes
+        The circular buffer URL parameter. It must have been checked by :func:`find_endstop`.
+    endmarkerpos : int
+        The position of the endstop marker returned by :func:`find_endstop`.
 
+    Returns
+    -------
+    The decoded endstop: hash, number of pairs and elapsed minutes.
+    """
+    endstopstart = endmarkerpos + 1 - CircularBufferURL.ENDSTOP_LEN_BYTES
+    if endstopstart >= 0:
+        endstop = circb64[endstopstart:endmarkerpos + 1]
+    else:
+        # The endstop wraps around the end of the circular buffer.
+        endstop = circb64[endstopstart:] + circb64[:endmarkerpos + 1]
+    return decode_buffer(endstop)[:ENDSTOP_HASHN_BYTES + ENDSTOP_ELAPSED_BYTES]
+
+
+def unpack_endstop(endstopbytes: bytes) -> tuple:
+    """
+
+    Parameters
+    ----------
+    endstopbytes : bytes
+        The decoded endstop. See :attr:`CircularBufferURL.endstopbytes`.
+
+    Returns
+    -------
+    The hash fragment as a hex string, the number of valid pairs and the minutes elapsed since the newest sample.
+    """
+    # The first 12 characters of the endstop decode to the MD5 hash and the number of valid pairs.
+    hashbytes = endstopbytes[0:7]
+    npairs = unpack(">H", endstopbytes[7:ENDSTOP_HASHN_BYTES])[0]
+    # The last 4 characters xxx~ decode to the elapsed minutes since the previous sample.
+    elapsedmins = int.from_bytes(endstopbytes[ENDSTOP_HASHN_BYTES:], byteorder='little')
+    return hashbytes.hex(), npairs, elapsedmins
+
+
+def decode_buffer(b64string) -> bytes:
+    """
+    Base64 decode a circular buffer, or part of one, with the endstop byte decoded as zero bits.
+
+    Parameters
+    ----------
+    b64string : str or bytes
+        URL safe base64 characters. The length must be a whole number of blocks.
+
+    Returns
+    -------
+    The decoded bytes.
+
+    Raises
+    ------
+    InvalidCircularBufferError
+        If b64string contains a character that is not URL safe base64.
+    """
+    try:
+        decoded = B64Decoder.b64decode_buffer(b64string, CircularBufferURL.ENDSTOP_BYTE, replacement='A')
+    except (binascii.Error, UnicodeEncodeError):
+        decoded = None
 
+    # Characters outside the base64 alphabet are skipped by the decoder, so the output would be short.
+    if decoded is None or len(decoded) != len(b64string) // B64_BLOCK_LEN * BYTES_PER_B64_BLOCK:
+        raise InvalidCircularBufferError(b64string, "it contains characters that are not URL safe base64")
+    return decoded
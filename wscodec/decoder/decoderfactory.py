@@ -23,20 +23,56 @@
 #
 
 from datetime import datetime
-import pkg_resources
+from functools import lru_cache
+from mmap import mmap
+from time import perf_counter
+from typing import Callable, NamedTuple, Union
+from urllib.parse import unquote, unquote_to_bytes
 from .samples import SamplesURL
 from .b64decode import B64Decoder
-from .exceptions import InvalidMajorVersionError, InvalidFormatError
+from .exceptions import InvalidMajorVersionError, InvalidFormatError, MissingParameterError
+from .instrumentation import instrumented
+from . import metrics
 from . import hdc2021
 
+#: URL parameter names, in the order of the fields of :class:`URLParams`.
+URL_PARAMETERS = ('s', 'x', 't', 'q', 'v')
+# Parameter names are looked up as str or bytes, depending on the type of the URL.
+_PARAMETER_INDEX = dict([(name, index) for index, name in enumerate(URL_PARAMETERS)] +
+                        [(name.encode('ascii'), index) for index, name in enumerate(URL_PARAMETERS)])
+#: Query string delimiters: start, fragment, separator, assignment and percent escape.
+_STR_DELIMITERS = ('?', '#', '&', '=', '%')
+_BYTES_DELIMITERS = tuple(delimiter.encode('ascii') for delimiter in _STR_DELIMITERS)
 
+#: Decoder class for each codec format code.
+DECODERS = {
+    1: hdc2021.TempRH_URL,
+    2: hdc2021.Temp_URL
+}
+
+
+class URLParams(NamedTuple):
+    """
+    Values of the URL parameters that are needed to decode it.
+    """
+    serial: str
+    statb64: str
+    timeintb64: str
+    circb64: str
+    vfmtb64: str
+
+
+@instrumented('decode')
 def decode(secretkey: str,
            statb64: str,
            timeintb64: str,
            circb64: str,
            vfmtb64: str,
            usehmac: bool = True,
-           scantimestamp: datetime = None) -> SamplesURL:
+           scantimestamp: datetime = None,
+           usenumpy: bool = False,
+           newest: int = None,
+           since: datetime = None) -> SamplesURL:
     """
     Decode the version string and extract codec version and format code. An error is raised if the codec version does
     not match. A decoder object is returned based on the format code. An error is raised if no decoder is available
@@ -48,7 +84,8 @@ def decode(secretkey: str,
         HMAC secret key as a string. Normally 16 characters long.
 
     statb64: str
-        Value of the URL parameter that holds status information (base64 encoded).
+        Value of the URL parameter that holds status information (base64 encoded). This and the other URL parameters
+        can also be bytes, bytearray or memoryview objects holding ASCII characters.
 
     timeintb64: str
         Value of the URL parameter that holds the time interval between samples in minutes (base64 encoded).
@@ -65,23 +102,175 @@ def decode(secretkey: str,
     scantimestamp: datetime
         The time that the tag was scanned. All decoded samples will be timestamped relative to this.
 
+    usenumpy: bool
+        True to decode the circular buffer payload with NumPy, which must be installed. This is faster for long buffers.
+
+    newest: int
+        Only create the newest N samples. The HMAC is still verified over the whole buffer. Defaults to all samples.
+
+    since: datetime
+        Only create samples timestamped at or after this time. It is compared with timestamps relative to
+        scantimestamp, so both must be timezone aware or both naive. Defaults to all samples.
+
     Returns
     --------
     SamplesURL
         An object containing a list of timestamped environmental sensor samples.
 
     """
+    registry = metrics.get_registry()
+    start = perf_counter()
+
+    try:
+        encodermajorversion, formatcode = _get_encoderversion(vfmtb64)
+        decodermajorversion = _get_decoderversion()
 
-    encodermajorversion, formatcode = _get_encoderversion(vfmtb64)
-    decodermajorversion = _get_decoderversion()
+        if encodermajorversion != decodermajorversion:
+            raise InvalidMajorVersionError(encodermajorversion, decodermajorversion)
 
-    if encodermajorversion != decodermajorversion:
-        raise InvalidMajorVersionError(encodermajorversion, decodermajorversion)
+        decoder = _get_decoder(formatcode)(statb64=statb64, timeintb64=timeintb64, circb64=circb64, usehmac=usehmac,
+                                           secretkey=secretkey, scantimestamp=scantimestamp, usenumpy=usenumpy,
+                                           newest=newest, since=since)
+    except Exception as error:
+        if registry is not None:
+            registry.observe_failure(error, perf_counter() - start)
+        raise
 
-    decoder = _get_decoder(formatcode)(statb64=statb64, timeintb64=timeintb64, circb64=circb64, usehmac=usehmac, secretkey=secretkey, scantimestamp=scantimestamp)
+    if registry is not None:
+        registry.observe_success(formatcode, perf_counter() - start, decoder.nsamples)
     return decoder
 
 
+def decode_url(url: str,
+               secretkey: Union[str, Callable[[str], str]],
+               usehmac: bool = True,
+               scantimestamp: datetime = None,
+               usenumpy: bool = False,
+               newest: int = None,
+               since: datetime = None) -> SamplesURL:
+    """
+    Extract parameters from a tag URL and decode it.
+
+    Parameters
+    -----------
+    url: str or bytes-like object
+        The full URL read from the tag, including the query string.
+
+    secretkey: str or Callable[[str], str]
+        HMAC secret key, or a function that returns the secret key for a tag serial. This is called before the
+        payload is decoded. The serial is bytes when url is not a str.
+
+    usehmac, scantimestamp, usenumpy, newest, since:
+        As for :func:`decode`.
+
+    Returns
+    --------
+    SamplesURL
+        An object containing a list of timestamped environmental sensor samples.
+
+    """
+    return decode_params(extract_params(url), secretkey, usehmac=usehmac, scantimestamp=scantimestamp,
+                         usenumpy=usenumpy, newest=newest, since=since)
+
+
+def decode_params(params: URLParams,
+                  secretkey: Union[str, Callable[[str], str]],
+                  usehmac: bool = True,
+                  scantimestamp: datetime = None,
+                  usenumpy: bool = False,
+                  newest: int = None,
+                  since: datetime = None) -> SamplesURL:
+    """
+    Decode parameters returned by :func:`extract_params`. The secret key is looked up first if necessary.
+
+    Parameters
+    -----------
+    params: URLParams
+        Values of the URL parameters.
+
+    secretkey, usehmac, scantimestamp, usenumpy, newest, since:
+        As for :func:`decode_url`.
+
+    Returns
+    --------
+    SamplesURL
+        An object containing a list of timestamped environmental sensor samples.
+
+    """
+    if callable(secretkey):
+        secretkey = secretkey(params.serial)
+
+    return decode(secretkey=secretkey, statb64=params.statb64, timeintb64=params.timeintb64,
+                  circb64=params.circb64, vfmtb64=params.vfmtb64, usehmac=usehmac, scantimestamp=scantimestamp,
+                  usenumpy=usenumpy, newest=newest, since=since)
+
+
+def extract_params(url: str, start: int = 0, end: int = None) -> URLParams:
+    """
+    Find the URL parameters needed by the decoder in one pass over the query string. Other parameters are skipped.
+    Only values that contain a percent-encoded character are unquoted.
+
+    Parameters
+    -----------
+    url: str, bytes-like object or mmap
+        A URL or a query string. ASCII bytes are searched without being converted to a string.
+
+    start: int
+        Index in url where the URL starts.
+
+    end: int
+        Index in url where the URL ends. Defaults to the end of url.
+
+    Returns
+    --------
+    URLParams
+        Values of the serial, status, time interval, circular buffer and version parameters. These are bytes when url
+        is not a str.
+
+    """
+    if isinstance(url, str):
+        delimiters, unquotevalue = _STR_DELIMITERS, unquote
+    else:
+        # Parameter names must be hashable to be looked up, so a bytearray or memoryview is copied once. Slices of
+        # bytes and mmap objects are bytes.
+        url = url if isinstance(url, (bytes, mmap)) else bytes(url)
+        delimiters, unquotevalue = _BYTES_DELIMITERS, unquote_to_bytes
+    querystart, fragmentstart, separator, assignment, escape = delimiters
+
+    values = [None] * len(URL_PARAMETERS)
+    remaining = len(URL_PARAMETERS)
+
+    if end is None:
+        end = len(url)
+    # Without a query start character, the whole URL is treated as a query string.
+    start = url.find(querystart, start, end) + 1 or start
+    fragment = url.find(fragmentstart, start, end)
+    if fragment != -1:
+        end = fragment
+
+    while start < end and remaining:
+        stop = url.find(separator, start, end)
+        if stop == -1:
+            stop = end
+
+        # Every parameter name used by the encoder is 1 character long.
+        index = _PARAMETER_INDEX.get(url[start:start + 1])
+        if index is not None and url[start + 1:start + 2] == assignment and values[index] is None:
+            value = url[start + 2:stop]
+            if escape in value:
+                value = unquotevalue(value)
+            values[index] = value
+            remaining -= 1
+
+        start = stop + 1
+
+    for name, value in zip(URL_PARAMETERS, values):
+        if value is None:
+            raise MissingParameterError(name, url)
+
+    return URLParams(*values)
+
+
 def _get_encoderversion(vfmtb64):
     vfmtb64 = vfmtb64[-4:]
     vfmtbytes = B64Decoder.b64decode(vfmtb64)
@@ -91,12 +280,35 @@ def _get_encoderversion(vfmtb64):
     return encoderversion, formatcode
 
 
+@lru_cache(maxsize=None)
 def _get_decoderversion():
-    decoderversionstr = pkg_resources.require("cuplcodec")[0].version
+    """
+    The installed package version is looked up once and then cached.
+
+    Returns
+    -------
+    Major version of the installed cuplcodec package.
+
+    """
+    decoderversionstr = _get_packageversion("cuplcodec")
     decodermajorversion = int(decoderversionstr.split('.', 1)[0])
     return decodermajorversion
 
 
+def _get_packageversion(distname: str) -> str:
+    # importlib.metadata only reads the metadata of one distribution. It is part of the standard library from
+    # Python 3.8. pkg_resources is a slow fallback, because it scans every installed distribution on import.
+    try:
+        from importlib import metadata
+    except ImportError:
+        try:
+            import importlib_metadata as metadata
+        except ImportError:
+            import pkg_resources
+            return pkg_resources.require(distname)[0].version
+    return metadata.version(distname)
+
+
 def _get_decoder(formatcode: int):
     """
         Parameters
@@ -109,18 +321,9 @@ def _get_decoder(formatcode: int):
         Decoder class for the given format code.
 
         """
-    decoders = {
-        1: hdc2021.TempRH_URL,
-        2: hdc2021.Temp_URL
-    }
     try:
-        decoder = decoders[formatcode]
+        decoder = DECODERS[formatcode]
     except KeyError:
         raise InvalidFormatError(formatcode)
 
     return decoder
-
-
-
-
-
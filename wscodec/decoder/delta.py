@@ -0,0 +1,181 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+from datetime import datetime, timedelta
+from typing import NamedTuple
+from .circularbuffer import CircularBufferURL
+from .decoderfactory import decode
+from .pairs import BYTES_PER_DEMI, PAIRS_PER_DEMI
+from .samples import SamplesURL
+
+LOOPCOUNT_MODULUS = 0x10000     #: The encoder loop counter is 16-bits wide.
+
+
+class ScanState(NamedTuple):
+    """
+    The state of a tag circular buffer when it was scanned. Store this after decoding a URL and pass it to
+    :func:`decode_delta` with the next URL from the same tag.
+    """
+    loopcount: int
+    resetsalltime: int
+    endmarkerpos: int
+    npairs: int
+    elapsedmins: int
+    scantimestamp: datetime
+
+    @classmethod
+    def from_url(cls, decodedurl: SamplesURL):
+        """
+
+        Parameters
+        ----------
+        decodedurl : SamplesURL
+            A decoded URL.
+
+        Returns
+        -------
+        The scan state of the decoded URL.
+
+        """
+        return cls(loopcount=decodedurl.status.loopcount,
+                   resetsalltime=decodedurl.status.resetsalltime,
+                   endmarkerpos=decodedurl.endmarkerpos,
+                   npairs=decodedurl.npairs,
+                   elapsedmins=decodedurl.elapsedmins,
+                   scantimestamp=decodedurl.scantimestamp)
+
+    @property
+    def newest_timestamp(self) -> datetime:
+        """
+        Timestamp of the newest sample when the tag was scanned.
+        """
+        return self.scantimestamp - timedelta(minutes=self.elapsedmins)
+
+
+class Delta:
+    """
+    Samples added to a tag circular buffer since it was last scanned.
+
+    Parameters
+    ----------
+    url : SamplesURL
+        The newly decoded URL.
+    samples : list
+        Samples that were not in the previous scan, newest first.
+    gap : bool
+        True if some samples may have been lost between the two scans. Either the tag has been reset or more samples
+        were added than the circular buffer can hold. All samples in url are returned in this case.
+    """
+    def __init__(self, url: SamplesURL, samples: list, gap: bool):
+        self.url = url
+        self.samples = samples
+        self.gap = gap
+        self.state = ScanState.from_url(url)
+
+
+def decode_delta(previous: ScanState, **kwargs) -> Delta:
+    """
+    Decode a URL and return only the samples added since the previous scan of the same tag.
+
+    The whole URL is verified, exactly as by :func:`decode`. The number of pairs written since the previous scan is
+    calculated from the loop count, the end marker position and npairs of both scans. Only samples from these pairs
+    are created.
+
+    The oldest of these pairs can also hold the newest sample of the previous scan. A sample from this pair is only
+    returned if it is newer than the previous newest sample by at least half of the time interval.
+
+    Parameters
+    ----------
+    previous : ScanState
+        State of the previous scan of this tag or None if there is none.
+    **kwargs
+        Keyword arguments for :func:`decode`.
+
+    Returns
+    -------
+    Delta
+        The new samples and the state to pass in with the next URL from this tag.
+
+    """
+    decodedurl = decode(**kwargs)
+
+    if previous is None:
+        return Delta(decodedurl, decodedurl.samples, gap=False)
+
+    newpairs = _newpairs(previous, decodedurl)
+
+    if newpairs is None or newpairs > decodedurl.npairs:
+        return Delta(decodedurl, decodedurl.samples, gap=True)
+
+    threshold = previous.newest_timestamp + decodedurl.timeinterval / 2
+    samples = list()
+
+    for pairindex, pairsamples in enumerate(decodedurl.iter_pair_samples()):
+        if pairindex < newpairs:
+            samples.extend(pairsamples)
+        elif pairindex == newpairs:
+            samples.extend(sample for sample in pairsamples if sample.timestamp >= threshold)
+        else:
+            break
+
+    return Delta(decodedurl, samples, gap=False)
+
+
+def _newpairs(previous: ScanState, decodedurl: SamplesURL):
+    """
+
+    Returns
+    -------
+    The number of pairs written since the previous scan or None if the tag has been reset in between.
+    """
+    if previous.resetsalltime != decodedurl.status.resetsalltime:
+        return None
+
+    buflendemis = len(decodedurl.circb64) // BYTES_PER_DEMI
+    loops = (decodedurl.status.loopcount - previous.loopcount) % LOOPCOUNT_MODULUS
+
+    newpairs = loops * buflendemis * PAIRS_PER_DEMI \
+        + _pairs_written_this_loop(decodedurl.endmarkerpos, decodedurl.npairs, buflendemis) \
+        - _pairs_written_this_loop(previous.endmarkerpos, previous.npairs, buflendemis)
+
+    if newpairs < 0:
+        return None
+
+    return newpairs
+
+
+def _pairs_written_this_loop(endmarkerpos: int, npairs: int, buflendemis: int) -> int:
+    """
+    The encoder cursor demi holds the newest pair. It is followed by the 2 endstop demis, the last of which ends in
+    the end marker. The loop count is increased each time the cursor wraps around to the first demi.
+
+    Returns
+    -------
+    The number of pairs written since the loop count was last increased.
+    """
+    endstopdemis = CircularBufferURL.ENDSTOP_LEN_BYTES // BYTES_PER_DEMI
+    cursordemi = ((endmarkerpos + 1) // BYTES_PER_DEMI - endstopdemis - 1) % buflendemis
+    # The cursor demi contains one valid pair if npairs is odd and two if it is even.
+    pairsincursordemi = PAIRS_PER_DEMI - (npairs % PAIRS_PER_DEMI)
+    return cursordemi * PAIRS_PER_DEMI + pairsincursordemi
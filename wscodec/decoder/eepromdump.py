@@ -0,0 +1,97 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import mmap
+import os
+from datetime import datetime
+from typing import Callable, Iterator, Tuple, Union
+from .decoderfactory import extract_params, decode_params
+from .exceptions import InvalidNDEFError, MALFORMED_URL_ERRORS
+from .ndefmessage import find_uri, RECORD_MB
+
+EEPROM_BLOCK_BYTES = 16                             #: The number of bytes in an NT3H2111 EEPROM block.
+EEPROM_BLOCKS = 64                                  #: The number of blocks in one EEPROM image.
+IMAGE_BYTES = EEPROM_BLOCK_BYTES * EEPROM_BLOCKS    #: The number of bytes in one EEPROM image.
+NDEF_RECORD_START = 20                              #: Offset of the NDEF record header, after the NDEF Message TLV.
+
+
+def decode_dump(path: Union[str, os.PathLike],
+                secretkey: Union[str, Callable[[bytes], str]],
+                usehmac: bool = True,
+                scantimestamp: datetime = None,
+                usenumpy: bool = False,
+                first: int = 0,
+                newest: int = None,
+                since: datetime = None) -> Iterator[Tuple[int, object]]:
+    """
+    Decode a file of concatenated EEPROM images, one image at a time.
+
+    The file is memory-mapped. In each image, the NDEF record starts at :data:`NDEF_RECORD_START`. Its header gives
+    the range of the URL, which is searched in place for the URL parameters. Only the parameter values are copied
+    out of the file. A trailing partial image is ignored.
+
+    Parameters
+    -----------
+    path: str or os.PathLike
+        File of concatenated :data:`IMAGE_BYTES` byte images.
+
+    secretkey: str or Callable[[bytes], str]
+        HMAC secret key, or a function that returns the secret key for a tag serial (as bytes).
+
+    usehmac, scantimestamp, usenumpy, newest, since:
+        As for :func:`wscodec.decoder.decode`.
+
+    first: int
+        Index of the first image to decode. Use this to resume an interrupted run.
+
+    Yields
+    -------
+    A tuple of the image index and either the decoded object or the error raised while decoding. An error in one
+    image does not stop the others being decoded. See :data:`wscodec.decoder.exceptions.MALFORMED_URL_ERRORS`.
+
+    """
+    with open(path, 'rb') as dumpfile:
+        nimages = os.fstat(dumpfile.fileno()).st_size // IMAGE_BYTES
+        if nimages == 0:
+            return
+
+        with mmap.mmap(dumpfile.fileno(), 0, access=mmap.ACCESS_READ) as dump:
+            for index in range(first, nimages):
+                yield index, _decode_image(dump, index * IMAGE_BYTES, secretkey, usehmac=usehmac,
+                                           scantimestamp=scantimestamp, usenumpy=usenumpy, newest=newest,
+                                           since=since)
+
+
+def _decode_image(dump: mmap.mmap, imagestart: int, secretkey, **kwargs):
+    recordstart = imagestart + NDEF_RECORD_START
+    try:
+        # The record must start at a known offset, so do not search the image for TLV blocks.
+        if not dump[recordstart] & RECORD_MB:
+            raise InvalidNDEFError("There is no NDEF record at byte {} of the image.".format(NDEF_RECORD_START))
+        start, end = find_uri(dump, recordstart)
+        if end > imagestart + IMAGE_BYTES:
+            raise InvalidNDEFError("The URI record extends past the end of the image.")
+        return decode_params(extract_params(dump, start, end), secretkey, **kwargs)
+    except MALFORMED_URL_ERRORS as error:
+        return error
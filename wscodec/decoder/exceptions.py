@@ -22,6 +22,8 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 
+from struct import error as StructError
+
 # Helpful: https://julien.danjou.info/python-exceptions-guide/
 
 class DecoderError(Exception):
@@ -30,6 +32,18 @@ class DecoderError(Exception):
     def __init__(self, msg="cupl Decoder Error"):
         super().__init__(msg)
 
+    def __reduce__(self):
+        # By default an exception is unpickled by calling its class with self.args. Subclasses of this take
+        # different constructor arguments, so restore the attributes directly instead.
+        return _unpickle_error, (self.__class__, self.args, self.__dict__)
+
+
+def _unpickle_error(cls, args, state):
+    error = cls.__new__(cls)
+    error.args = args
+    error.__dict__.update(state)
+    return error
+
 
 class InvalidMajorVersionError(DecoderError):
     def __init__(self, encoderversion, decoderversion, msg=None):
@@ -79,3 +93,44 @@ class DelimiterNotFoundError(DecoderError):
         super().__init__(msg)
         self.circb64 = circb64
         self.status = status
+
+
+class MissingParameterError(DecoderError):
+    def __init__(self, parameter, url, msg=None):
+        if msg is None:
+            msg = "URL parameter {} not found in URL = {}".format(parameter, url)
+        super().__init__(msg)
+        self.parameter = parameter
+        self.url = url
+
+
+class InvalidNDEFError(DecoderError):
+    def __init__(self, reason, msg=None):
+        if msg is None:
+            msg = "No URI record found in the NDEF message. {}".format(reason)
+        super().__init__(msg)
+        self.reason = reason
+
+
+class InvalidCircularBufferError(DecoderError):
+    def __init__(self, circb64, reason, msg=None):
+        if msg is None:
+            msg = "The circular buffer is malformed: {}. Circular buffer string = {}".format(reason, circb64)
+        super().__init__(msg)
+        self.circb64 = circb64
+        self.reason = reason
+
+
+class InvalidStatusError(DecoderError):
+    def __init__(self, statb64, index, msg=None):
+        if msg is None:
+            msg = "Status string {} = {} contains characters that are not URL safe base64.".format(index, statb64)
+        super().__init__(msg)
+        self.statb64 = statb64
+        self.index = index
+
+
+#: Errors raised while decoding a malformed URL. The circular buffer only raises DecoderError, but the status, time
+#: interval and version parameters are decoded by the standard library, which raises binascii.Error (a ValueError),
+#: IndexError or struct.error.
+MALFORMED_URL_ERRORS = (DecoderError, ValueError, IndexError, StructError)
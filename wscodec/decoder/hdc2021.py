@@ -23,7 +23,11 @@
 #
 
 from datetime import datetime
-from .samples import SamplesURL, Sample
+from .samples import SamplesURL, Sample, SampleBatch, LookupTable
+from .pairs import BYTES_PER_PAIR
+
+#: Width of an HDC2021 ADC reading in bits.
+READING_BITS = 12
 
 
 class TempSample(Sample):
@@ -35,7 +39,7 @@ class TempSample(Sample):
         """
         super().__init__(timestamp)
         self.rawtemp = rawtemp
-        self.temp = self.reading_to_temp(rawtemp)
+        self.temp = TEMP_LUT[rawtemp]
 
     @staticmethod
     def reading_to_temp(reading: int) -> float:
@@ -50,7 +54,7 @@ class TempRHSample(TempSample):
     def __init__(self, rawtemp: int, rawrh: int, timestamp: datetime):
         super().__init__(rawtemp, timestamp)
         self.rawrh = rawrh
-        self.rh = self.reading_to_rh(rawrh)
+        self.rh = RH_LUT[rawrh]
 
     @staticmethod
     def reading_to_rh(reading: int) -> float:
@@ -62,6 +66,12 @@ class TempRHSample(TempSample):
         return (reading * 100) / 4096
 
 
+#: Temperature in degrees C for every possible ADC reading.
+TEMP_LUT = LookupTable(TempSample.reading_to_temp, bits=READING_BITS)
+#: Relative Humidity in percent for every possible ADC reading.
+RH_LUT = LookupTable(TempRHSample.reading_to_rh, bits=READING_BITS)
+
+
 class TempRH_URL(SamplesURL):
     def __init__(self, *args, **kwargs):
         """
@@ -69,17 +79,25 @@ class TempRH_URL(SamplesURL):
         temperature (degrees C) and relative humidity (%) readings.
         """
         super().__init__(*args, **kwargs)
-        timestamp_gen = self.generate_timestamp()
 
-        for pair in self.pairs:
-            temp = pair.rd0
-            rh = pair.rd1
+    def _count_samples(self):
+        return self.npairs
+
+    def _pair_samples(self, rd0: int, rd1: int, timestamp_gen):
+        yield TempRHSample(rd0, rd1, timestamp=next(timestamp_gen))
 
-            sample = TempRHSample(temp, rh, timestamp=next(timestamp_gen))
-            self.samples.append(sample)
+    def _build_batch(self):
+        rawtemp, rawrh = self.get_readings(self._window_npairs())
+
+        return SampleBatch(TempRHSample, self.newest_timestamp, self.timeinterval,
+                           raw={'rawtemp': rawtemp, 'rawrh': rawrh},
+                           converters={'temp': ('rawtemp', TEMP_LUT),
+                                       'rh': ('rawrh', RH_LUT)})
 
 
 class Temp_URL(SamplesURL):
+    SAMPLES_PER_PAIR = 2
+
     def __init__(self, *args, **kwargs):
         """
 
@@ -87,12 +105,29 @@ class Temp_URL(SamplesURL):
         temperature reading in degrees C.
         """
         super().__init__(*args, **kwargs)
-        timestamp_gen = self.generate_timestamp()
-
-        for pair in self.pairs:
-            if pair.rd1 != 4095:
-                sample = TempSample(pair.rd1, timestamp=next(timestamp_gen))
-                self.samples.append(sample)
 
-            sample = TempSample(pair.rd0, timestamp=next(timestamp_gen))
-            self.samples.append(sample)
+    def _count_samples(self):
+        # Each pair holds two samples, unless reading1 has not been written yet. A reading1 of 4095 has an MSB of
+        # 0xFF, so only pairs with that byte are found with a bytes search and checked. No other pair is decoded.
+        pairbytes = self.pairbytes
+        rd1MSB = pairbytes[1::BYTES_PER_PAIR]
+        unwritten = 0
+        index = rd1MSB.find(0xFF)
+        while index != -1:
+            if pairbytes[index * BYTES_PER_PAIR + 2] & 0xF == 0xF:
+                unwritten += 1
+            index = rd1MSB.find(0xFF, index + 1)
+        return 2 * self.npairs - unwritten
+
+    def _pair_samples(self, rd0: int, rd1: int, timestamp_gen):
+        if rd1 != 4095:
+            yield TempSample(rd1, timestamp=next(timestamp_gen))
+
+        yield TempSample(rd0, timestamp=next(timestamp_gen))
+
+    def _build_batch(self):
+        rawtemp = self.get_readings_interleaved(unwritten=4095, npairs=self._window_npairs())
+
+        return SampleBatch(TempSample, self.newest_timestamp, self.timeinterval,
+                           raw={'rawtemp': rawtemp},
+                           converters={'temp': ('rawtemp', TEMP_LUT)})
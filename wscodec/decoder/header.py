@@ -0,0 +1,112 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+from datetime import timedelta
+from typing import NamedTuple
+from .b64decode import B64Decoder, to_ascii_bytes
+from .circularbuffer import find_endstop, decode_endstop, unpack_endstop
+from .decoderfactory import _get_encoderversion, _get_decoderversion, _get_decoder
+from .exceptions import InvalidMajorVersionError
+from .status import Status
+
+
+class URLHeader(NamedTuple):
+    """
+    Metadata decoded from a URL without its payload. See :func:`decode_header`.
+    """
+    formatcode: int
+    status: Status
+    npairs: int
+    elapsedmins: int
+    endmarkerpos: int
+    hash: str
+    timeinterval: timedelta
+    timespan: timedelta
+
+    @property
+    def loopcount(self) -> int:
+        return self.status.loopcount
+
+    @property
+    def resetsalltime(self) -> int:
+        return self.status.resetsalltime
+
+    @property
+    def batvoltageraw(self) -> int:
+        return self.status.get_batvoltageraw()
+
+    @property
+    def resetcause(self) -> dict:
+        return self.status.resetcause
+
+
+def decode_header(statb64: str, timeintb64: str, circb64: str, vfmtb64: str) -> URLHeader:
+    """
+    Decode the status, version and time interval parameters and the circular buffer endstop. The payload is not
+    decoded, so the time taken does not depend on the length of the circular buffer.
+
+    The hash is not verified, because that requires the payload. Use :func:`wscodec.decoder.verify` or
+    :func:`wscodec.decoder.decode` before trusting any of these fields.
+
+    Parameters
+    -----------
+    statb64, timeintb64, circb64, vfmtb64:
+        As for :func:`wscodec.decoder.decode`.
+
+    Returns
+    --------
+    URLHeader
+        The status, the number of pairs, the minutes elapsed since the newest sample, the end marker position, the
+        hash fragment, the time interval between samples and the time span between the oldest sample and the scan.
+        For formats that store more than one sample per pair, the newest pair may not be full. Then the time span is
+        over-estimated by up to one time interval.
+
+    """
+    encodermajorversion, formatcode = _get_encoderversion(vfmtb64)
+    decodermajorversion = _get_decoderversion()
+
+    if encodermajorversion != decodermajorversion:
+        raise InvalidMajorVersionError(encodermajorversion, decodermajorversion)
+
+    # Raises an error if there is no decoder for this format.
+    decoderclass = _get_decoder(formatcode)
+
+    status = Status.from_b64(statb64)
+    # A memoryview cannot be searched, so it is copied.
+    circb64 = circb64 if isinstance(circb64, str) else to_ascii_bytes(circb64)
+    endmarkerpos = find_endstop(circb64, status)
+    hashhex, npairs, elapsedmins = unpack_endstop(decode_endstop(circb64, endmarkerpos))
+
+    timeintmins = int.from_bytes(B64Decoder.b64decode(timeintb64), byteorder='little')
+    nsamples = npairs * decoderclass.SAMPLES_PER_PAIR
+    timespanmins = elapsedmins + max(nsamples - 1, 0) * timeintmins
+
+    return URLHeader(formatcode=formatcode,
+                     status=status,
+                     npairs=npairs,
+                     elapsedmins=elapsedmins,
+                     endmarkerpos=endmarkerpos,
+                     hash=hashhex,
+                     timeinterval=timedelta(minutes=timeintmins),
+                     timespan=timedelta(minutes=timespanmins))
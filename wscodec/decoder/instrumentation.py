@@ -0,0 +1,199 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from math import ceil
+from time import perf_counter
+
+try:
+    from contextvars import ContextVar
+except ImportError:  # Python 3.6. Fall back to a thread-local variable.
+    import threading
+
+    class ContextVar:
+        def __init__(self, name, default=None):
+            self.name = name
+            self.default = default
+            self._local = threading.local()
+
+        def get(self):
+            return getattr(self._local, 'value', self.default)
+
+        def set(self, value):
+            token = self.get()
+            self._local.value = value
+            return token
+
+        def reset(self, token):
+            self._local.value = token
+
+_collector = ContextVar('wscodec_collector', default=None)
+_record = ContextVar('wscodec_record', default=None)
+
+
+class Collector:
+    """
+    Collects the time taken by each decoder stage, in a record per decode. Each record maps a stage name to a tuple
+    of the seconds taken, the number of items processed and whether the stage raised an exception. A stage that
+    raises is still timed, so failed decodes are included.
+
+    Parameters
+    ----------
+    maxrecords : int
+        Maximum number of records kept. The oldest are discarded first. Defaults to no limit.
+    """
+    def __init__(self, maxrecords: int = None):
+        self.records = deque(maxlen=maxrecords)
+
+    def clear(self):
+        """
+        Discard all records.
+        """
+        self.records.clear()
+
+    def summary(self, percentiles=(50, 90, 99)) -> dict:
+        """
+
+        Parameters
+        ----------
+        percentiles
+            Percentiles of stage time to report.
+
+        Returns
+        -------
+        A dictionary keyed by stage name. Each value is a dictionary containing the number of times the stage ran
+        (`calls`), the number of times it raised an exception (`failures`), its mean time in seconds (`mean`), the
+        requested percentiles of time in seconds (`p50`, `p99` etc.) and the mean number of items processed (`items`).
+
+        """
+        stagetimes = dict()
+        stageitems = dict()
+        stagefailures = dict()
+        for record in self.records:
+            for stage, (seconds, count, failed) in record.items():
+                stagetimes.setdefault(stage, []).append(seconds)
+                stageitems.setdefault(stage, []).append(count)
+                stagefailures[stage] = stagefailures.get(stage, 0) + failed
+
+        summary = dict()
+        for stage, times in stagetimes.items():
+            times.sort()
+            stagesummary = {'calls': len(times), 'failures': stagefailures[stage], 'mean': sum(times) / len(times)}
+            for percentile in percentiles:
+                stagesummary['p{}'.format(percentile)] = _percentile(times, percentile)
+            counts = [count for count in stageitems[stage] if count is not None]
+            stagesummary['items'] = sum(counts) / len(counts) if counts else None
+            summary[stage] = stagesummary
+        return summary
+
+    def _run(self, stage: str, count, func, args, kwargs):
+        record = _record.get()
+        outermost = record is None
+        if outermost:
+            record = dict()
+            token = _record.set(record)
+
+        items = None
+        failed = True
+        start = perf_counter()
+        try:
+            result = func(*args, **kwargs)
+            items = count(args[0], result) if count else None
+            failed = False
+            return result
+        finally:
+            # This runs when the stage raises too, so failures are timed and recorded.
+            elapsed = perf_counter() - start
+            if outermost:
+                _record.reset(token)
+
+            seconds, previous, previousfailed = record.get(stage, (0.0, None, False))
+            if previous is not None:
+                items = previous + (items or 0)
+            record[stage] = (seconds + elapsed, items, failed or previousfailed)
+
+            if outermost:
+                self.records.append(record)
+
+
+@contextmanager
+def collect(collector: Collector = None):
+    """
+    Record the time taken by each decoder stage within a with block. Stages are functions wrapped with
+    :func:`instrumented`. When no collector is active, these only check a context variable before they run.
+
+    Each record holds the stages that ran inside one call to :func:`wscodec.decoder.decode`. A stage that runs outside
+    of a decode, for example when samples are created on first access, gets a record of its own.
+
+    The active collector is context-local, so decodes in other threads or asyncio tasks are not recorded. This
+    includes decodes that run in an executor.
+
+    Parameters
+    ----------
+    collector : Collector
+        Collector to add records to. A new one is created by default.
+
+    Yields
+    ------
+    The active :class:`Collector`.
+
+    """
+    collector = collector or Collector()
+    token = _collector.set(collector)
+    try:
+        yield collector
+    finally:
+        _collector.reset(token)
+
+
+def instrumented(stage: str, count=None):
+    """
+    Decorator that times a function as one stage of the decoder, if a :class:`Collector` is active.
+
+    Parameters
+    ----------
+    stage : str
+        Name of the stage.
+    count
+        Optional function that returns the number of items processed by the stage. It is called with the first
+        argument of the wrapped function (self for a method) and its return value.
+
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            collector = _collector.get()
+            if collector is None:
+                return func(*args, **kwargs)
+            return collector._run(stage, count, func, args, kwargs)
+        return wrapper
+    return decorator
+
+
+def _percentile(ordered: list, percentile: float) -> float:
+    # Nearest-rank percentile of a sorted list.
+    rank = max(ceil(percentile / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
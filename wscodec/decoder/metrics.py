@@ -0,0 +1,197 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+from bisect import bisect_left
+from threading import Lock
+
+#: Upper bounds of the decode latency histogram buckets in seconds.
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+#: Upper bounds of the samples per URL histogram buckets.
+SAMPLES_BUCKETS = (0, 10, 25, 50, 100, 200, 400, 800)
+
+
+class Histogram:
+    """
+    Counts of observations in buckets with fixed upper bounds, plus their sum and total count.
+
+    Parameters
+    ----------
+    buckets
+        Upper bound of each bucket in ascending order. A final bucket with no upper bound is added.
+    """
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        """
+
+        Parameters
+        ----------
+        value
+            Value to add to the histogram.
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list:
+        """
+
+        Returns
+        -------
+        A list of (upper bound, count of observations less than or equal to it) tuples. The last upper bound is
+        infinity.
+        """
+        total = 0
+        cumulative = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            cumulative.append((bound, total))
+        return cumulative
+
+
+class MetricsRegistry:
+    """
+    Outcome counters and histograms for every call to :func:`wscodec.decoder.decode`. These are updated by the
+    decoder itself, so the caller does not have to time each call or catch its exceptions. Metrics are off by default,
+    so that decode() does not count samples it would not otherwise create. Enable them with
+    ``set_registry(MetricsRegistry())``.
+
+    Parameters
+    ----------
+    latency_buckets
+        Upper bounds of the decode latency histogram buckets in seconds.
+    samples_buckets
+        Upper bounds of the samples per URL histogram buckets.
+    """
+    def __init__(self, latency_buckets=LATENCY_BUCKETS, samples_buckets=SAMPLES_BUCKETS):
+        self._lock = Lock()
+        self.decodes = dict()
+        self.failures = dict()
+        self.latency = Histogram(latency_buckets)
+        self.samples = Histogram(samples_buckets)
+
+    def observe_success(self, formatcode: int, seconds: float, nsamples: int):
+        """
+        Record a successful decode.
+
+        Parameters
+        ----------
+        formatcode : int
+            Format code of the decoded URL.
+        seconds : float
+            Time taken to decode.
+        nsamples : int
+            Number of samples in the URL.
+        """
+        with self._lock:
+            self.decodes[formatcode] = self.decodes.get(formatcode, 0) + 1
+            self.latency.observe(seconds)
+            self.samples.observe(nsamples)
+
+    def observe_failure(self, error: Exception, seconds: float):
+        """
+        Record a decode that raised an exception.
+
+        Parameters
+        ----------
+        error : Exception
+            The exception raised. Failures are counted by exception class name.
+        seconds : float
+            Time taken before the exception was raised.
+        """
+        errorname = type(error).__name__
+        with self._lock:
+            self.failures[errorname] = self.failures.get(errorname, 0) + 1
+            self.latency.observe(seconds)
+
+    def prometheus(self, prefix: str = "cupl") -> str:
+        """
+
+        Parameters
+        ----------
+        prefix : str
+            Prefix of every metric name.
+
+        Returns
+        -------
+        All metrics in the Prometheus text exposition format.
+        """
+        with self._lock:
+            lines = []
+            _counter_lines(lines, prefix + "_decodes_total", "Successful decodes by format code.", "format",
+                           self.decodes)
+            _counter_lines(lines, prefix + "_decode_failures_total", "Failed decodes by exception class.", "error",
+                           self.failures)
+            _histogram_lines(lines, prefix + "_decode_duration_seconds", "Time taken to decode a URL.",
+                             self.latency)
+            _histogram_lines(lines, prefix + "_decode_samples", "Number of samples decoded from a URL.",
+                             self.samples)
+        return "\n".join(lines) + "\n"
+
+
+def _counter_lines(lines: list, name: str, helptext: str, label: str, counts: dict):
+    lines.append("# HELP {} {}".format(name, helptext))
+    lines.append("# TYPE {} counter".format(name))
+    for value, count in sorted(counts.items()):
+        lines.append('{}{{{}="{}"}} {}'.format(name, label, value, count))
+
+
+def _histogram_lines(lines: list, name: str, helptext: str, histogram: Histogram):
+    lines.append("# HELP {} {}".format(name, helptext))
+    lines.append("# TYPE {} histogram".format(name))
+    for bound, count in histogram.cumulative():
+        le = "+Inf" if bound == float('inf') else repr(bound)
+        lines.append('{}_bucket{{le="{}"}} {}'.format(name, le, count))
+    lines.append("{}_sum {}".format(name, histogram.sum))
+    lines.append("{}_count {}".format(name, histogram.count))
+
+
+_registry = None
+
+
+def get_registry() -> MetricsRegistry:
+    """
+
+    Returns
+    -------
+    The registry updated by :func:`wscodec.decoder.decode`, or None if metrics are disabled. They are disabled until
+    a registry is set with :func:`set_registry`.
+    """
+    return _registry
+
+
+def set_registry(registry: MetricsRegistry = None):
+    """
+
+    Parameters
+    ----------
+    registry : MetricsRegistry
+        Registry to be updated by :func:`wscodec.decoder.decode` from now on. None disables metrics.
+    """
+    global _registry
+    _registry = registry
@@ -0,0 +1,167 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+from datetime import datetime
+from struct import Struct, error as StructError
+from typing import Callable, Union
+from .decoderfactory import extract_params, decode_params
+from .exceptions import InvalidNDEFError
+from .samples import SamplesURL
+
+TLV_NULL = 0x00             #: Type of a NULL TLV block, which has no length field.
+TLV_NDEF_MESSAGE = 0x03     #: Type of an NDEF Message TLV block.
+TLV_PROPRIETARY = 0xFD      #: Type of a proprietary TLV block.
+TLV_TERMINATOR = 0xFE       #: Type of the TLV block that ends the tag data.
+TLV_LONG_LENGTH = 0xFF      #: First length byte of a TLV block with a 3 byte length field.
+
+RECORD_MB = 0x80            #: Message Begin flag in an NDEF record header.
+RECORD_SR = 0x10            #: Short Record flag. The payload length is 1 byte instead of 4.
+RECORD_IL = 0x08            #: ID Length flag. The record has an ID length field.
+RECORD_TNF_MASK = 0x07      #: Type Name Format field of an NDEF record header.
+TNF_WELL_KNOWN = 0x01       #: Type Name Format of an NFC Forum well-known type.
+URI_RECORD_TYPE = b'U'      #: Type of a URI record.
+
+_UINT16 = Struct(">H")
+_UINT32 = Struct(">I")
+
+
+def find_uri(message: bytes, start: int = 0) -> tuple:
+    """
+    Locate the URI in the first record of an NDEF message. Only record headers are parsed. Nothing is copied.
+
+    Parameters
+    ----------
+    message : bytes
+        Tag data that starts with TLV blocks (for example, from the first byte after the NT3H2111 configuration block)
+        or with the first NDEF record header. Any object that supports indexing and the buffer protocol, such as an
+        mmap, can be used.
+    start : int
+        Index in message where the tag data starts.
+
+    Returns
+    -------
+    A (start, end) tuple. The URI, without its URI identifier code, is message[start:end].
+
+    """
+    try:
+        return _parse_uri_record(message, start)
+    except (IndexError, StructError) as error:
+        raise InvalidNDEFError("The message is truncated. {}".format(error)) from None
+
+
+def decode_ndef(message,
+                secretkey: Union[str, Callable[[bytes], str]],
+                usehmac: bool = True,
+                scantimestamp: datetime = None,
+                usenumpy: bool = False,
+                newest: int = None,
+                since: datetime = None) -> SamplesURL:
+    """
+    Decode the URL in an NDEF message read from a tag, without reconstructing the URL.
+
+    The URL parameters are found by searching the record payload in place. Each is then passed straight to
+    :func:`wscodec.decoder.decode` as bytes.
+
+    Parameters
+    -----------
+    message: bytes-like object
+        Raw tag data. See :func:`find_uri`.
+
+    secretkey: str or Callable[[bytes], str]
+        HMAC secret key, or a function that returns the secret key for a tag serial (as bytes).
+
+    usehmac, scantimestamp, usenumpy, newest, since:
+        As for :func:`wscodec.decoder.decode`.
+
+    Returns
+    --------
+    SamplesURL
+        An object containing a list of timestamped environmental sensor samples.
+
+    """
+    if not isinstance(message, bytes):
+        message = bytes(message)
+
+    start, end = find_uri(message)
+    return decode_params(extract_params(message, start, end), secretkey, usehmac=usehmac,
+                         scantimestamp=scantimestamp, usenumpy=usenumpy, newest=newest, since=since)
+
+
+def _parse_uri_record(message: bytes, offset: int) -> tuple:
+    if not message[offset] & RECORD_MB or message[offset] in (TLV_PROPRIETARY, TLV_TERMINATOR):
+        offset = _find_ndef_tlv(message, offset)
+
+    header = message[offset]
+    typelen = message[offset + 1]
+    offset += 2
+
+    if header & RECORD_SR:
+        payloadlen = message[offset]
+        offset += 1
+    else:
+        payloadlen = _UINT32.unpack_from(message, offset)[0]
+        offset += _UINT32.size
+
+    idlen = 0
+    if header & RECORD_IL:
+        idlen = message[offset]
+        offset += 1
+
+    recordtype = message[offset:offset + typelen]
+    if (header & RECORD_TNF_MASK) != TNF_WELL_KNOWN or recordtype != URI_RECORD_TYPE:
+        raise InvalidNDEFError("The first record has TNF = {} and type = {}.".format(header & RECORD_TNF_MASK,
+                                                                                      bytes(recordtype)))
+
+    # Skip the type, the ID and then the 1 byte URI identifier code, which abbreviates the URI scheme.
+    start = offset + typelen + idlen + 1
+    end = start + payloadlen - 1
+    if payloadlen < 1 or end > len(message):
+        raise InvalidNDEFError("The URI record payload length = {} is invalid.".format(payloadlen))
+    return start, end
+
+
+def _find_ndef_tlv(message: bytes, offset: int) -> int:
+    # Walk the TLV blocks to the start of the value of the first NDEF Message TLV.
+    while True:
+        tlvtype = message[offset]
+        if tlvtype == TLV_NDEF_MESSAGE:
+            break
+        if tlvtype == TLV_TERMINATOR:
+            raise InvalidNDEFError("There is no NDEF Message TLV.")
+        if tlvtype == TLV_NULL:
+            offset += 1
+            continue
+        offset += 1 + _tlv_length_size(message, offset + 1) + _tlv_length(message, offset + 1)
+
+    return offset + 1 + _tlv_length_size(message, offset + 1)
+
+
+def _tlv_length_size(message: bytes, offset: int) -> int:
+    return 1 + _UINT16.size if message[offset] == TLV_LONG_LENGTH else 1
+
+
+def _tlv_length(message: bytes, offset: int) -> int:
+    if message[offset] == TLV_LONG_LENGTH:
+        return _UINT16.unpack_from(message, offset + 1)[0]
+    return message[offset]
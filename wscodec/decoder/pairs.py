@@ -22,10 +22,13 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 from .circularbuffer import CircularBufferURL
-from .exceptions import MessageIntegrityError
+from .exceptions import MessageIntegrityError, InvalidCircularBufferError
 from .b64decode import B64Decoder
-from typing import List
+from .instrumentation import instrumented
+from array import array
 from enum import Enum
+from functools import lru_cache
+from struct import Struct
 import hashlib
 import hmac
 
@@ -33,6 +36,30 @@ BYTES_PER_PAIR = 3                                      #: The number of bytes i
 BYTES_PER_PAIRB64 = 4                                   #: The number of bytes in each base64 encoded Pair.
 PAIRS_PER_DEMI = 2                                      #: The number of pairs in each 8-byte demi.
 BYTES_PER_DEMI = BYTES_PER_PAIRB64 * PAIRS_PER_DEMI     #: The number of bytes in each demi.
+BYTES_PER_DECODED_DEMI = BYTES_PER_PAIR * PAIRS_PER_DEMI  #: The number of bytes in each demi after base64 decoding.
+HMAC_CACHE_SIZE = 256                                   #: The number of secret keys in the HMAC cache.
+HASH_TRAILER = Struct(">HHHH")                          #: Status fields and end marker position appended to pairs.
+
+
+def import_numpy(purpose: str):
+    """
+    NumPy is optional and slow to import, so it is only imported when it is first needed.
+
+    Parameters
+    ----------
+    purpose : str
+        What NumPy is needed for. This is included in the error message.
+
+    Returns
+    -------
+    The numpy module.
+
+    """
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("NumPy is required to {}.".format(purpose)) from None
+    return numpy
 
 
 class HashType(Enum):
@@ -123,11 +150,87 @@ class Pair:
         return {'rd0': self.rd0, 'rd1': self.rd1}
 
 
+class PairArray:
+    """
+    A sequence of pairs held in a NumPy array instead of a list of :class:`Pair` objects.
+
+    Both 12-bit readings are rebuilt for every pair at once with array shifts and masks. :class:`Pair` objects are
+    only created when an element is accessed, so this can be used wherever a list of pairs is expected.
+
+    Parameters
+    ----------
+    pairbytes : numpy.ndarray
+        An (n, 3) array of uint8. Each row holds rd0MSB, rd1MSB and Lsb of one pair.
+    """
+    def __init__(self, pairbytes):
+        np = import_numpy("create a PairArray")
+        self.pairbytes = pairbytes
+
+        rd0MSB = pairbytes[:, 0].astype(np.uint16)
+        rd1MSB = pairbytes[:, 1].astype(np.uint16)
+        Lsb = pairbytes[:, 2]
+
+        self.rd0 = (rd0MSB << 4) | (Lsb >> 4)
+        self.rd1 = (rd1MSB << 4) | (Lsb & 0xF)
+
+    def __len__(self):
+        return len(self.pairbytes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.__class__(self.pairbytes[index])
+        return Pair.from_bytes(self.pairbytes[index].tolist())
+
+    def __iter__(self):
+        for pairbytes in self.pairbytes.tolist():
+            yield Pair.from_bytes(pairbytes)
+
+    def tobytes(self) -> bytes:
+        """
+
+        Returns
+        -------
+        The 3 bytes of each pair concatenated, newest pair first.
+        """
+        return self.pairbytes.tobytes()
+
+    def readings(self):
+        """
+
+        Returns
+        --------
+        Both 12-bit readings of each pair as a list of (rd0, rd1) tuples.
+        """
+        return list(zip(self.rd0.tolist(), self.rd1.tolist()))
+
+    def interleaved(self, unwritten: int):
+        """
+
+        Parameters
+        ----------
+        unwritten : int
+            Value of a reading1 that has not been written yet.
+
+        Returns
+        --------
+        A single array of readings: reading1 then reading0 of each pair, newest pair first. Unwritten readings are
+        left out.
+        """
+        np = import_numpy("interleave readings")
+        readings = np.stack((self.rd1, self.rd0), axis=1).ravel()
+        written = np.ones(len(readings), dtype=bool)
+        written[0::2] = self.rd1 != unwritten
+        return readings[written]
+
+
 class PairsURL(CircularBufferURL):
     """
-    This takes the payload of the linearised buffer, which is a long string of base64 characters. It decodes this
-    into a list of pairs. The hash (MD5 or HMAC-MD5) is taken and compared with that supplied in the URL by the
-    encoder. If the hashes match then the decode has been successful. If not, an exception is raised.
+    This takes the payload of the linearised buffer, which is a long string of base64 characters. It reorders the
+    decoded payload into a string of pair bytes, newest first. The hash (MD5 or HMAC-MD5) is taken and compared
+    with that supplied in the URL by the encoder. If the hashes match then the decode has been successful. If not, an
+    exception is raised.
+
+    The list of :class:`Pair` objects is only created when :attr:`pairs` is first accessed.
 
     Parameters
     ----------
@@ -137,18 +240,67 @@ class PairsURL(CircularBufferURL):
         True if the hash inside the circular buffer endstop is HMAC-MD5. False if it is MD5.
     secretkey: str
         HMAC secret key as a string. Normally 16 characters long.
+    usenumpy: bool
+        True to decode the payload into a :class:`PairArray` with NumPy. False to decode it into a list of pairs.
     **kwargs
         Keyword arguments to be passed to parent class constructors.
     """
-    def __init__(self, *args, usehmac: bool = False, secretkey: str = None,  **kwargs):
+    def __init__(self, *args, usehmac: bool = False, secretkey: str = None, usenumpy: bool = False, **kwargs):
+        self.usenumpy = usenumpy
+        self._pairs = None
         super().__init__(*args, **kwargs)
 
         self._decode_pairs()
         self._verify(usehmac, secretkey)
 
+    def _restore(self, *args, pairbytes: bytes, hashtype: HashType, usenumpy: bool = False, **kwargs):
+        """
+        See :meth:`CircularBufferURL.from_fields`.
+
+        Parameters
+        ----------
+        *args
+            Variable length argument list.
+        pairbytes : bytes
+            The 3 bytes of each valid pair concatenated, newest pair first.
+        hashtype : HashType
+            The hash algorithm that verified the pairs.
+        usenumpy : bool
+            True to create a :class:`PairArray` from the pair bytes.
+        **kwargs
+            Keyword arguments to be passed to parent class methods.
+        """
+        self.usenumpy = usenumpy
+        self._pairs = None
+        super()._restore(*args, **kwargs)
+        self.pairbytes = bytes(pairbytes)
+        self.hashtype = hashtype
+
+    @property
+    def pairs(self):
+        """
+        A list of pairs, newest first. This is a :class:`PairArray` when usenumpy is True. It is created from
+        :attr:`pairbytes` on first access.
+        """
+        if self._pairs is None:
+            if self.usenumpy:
+                np = import_numpy("decode pairs with usenumpy=True")
+                self._pairs = PairArray(np.frombuffer(self.pairbytes, dtype=np.uint8).reshape(-1, BYTES_PER_PAIR))
+            else:
+                self._pairs = [Pair.from_bytes(self.pairbytes[i:i+BYTES_PER_PAIR])
+                               for i in range(0, len(self.pairbytes), BYTES_PER_PAIR)]
+        return self._pairs
+
+    def __getstate__(self):
+        # Pairs are recreated from pairbytes when they are needed, so leave them out of the pickled state.
+        state = self.__dict__.copy()
+        state['_pairs'] = None
+        return state
+
+    @instrumented('verify', count=lambda self, _: len(self.pairbytes))
     def _verify(self, usehmac : bool, secretkey : str):
         """
-        Calculate a hash from the list of pairs according to the same algorithm used
+        Calculate a hash from the pair bytes (newest first) according to the same algorithm used
         by the encoder (see :ref:`pairhist_hash`). Besides pairs, data from the status URL parameter
         are included. This makes it very unlikely that the same data will be hashed twice, as well as 'protecting'
         the status parameter from modification by a 3rd party.
@@ -168,21 +320,11 @@ class PairsURL(CircularBufferURL):
             MessageIntegrityError: If the hash calculated by this decoder does not match the hash provided by the encoder.
 
         """
-        pairhist = bytearray()
-
-        for pair in self.pairs:
-            pairhist.append(pair.rd0MSB)
-            pairhist.append(pair.rd1MSB)
-            pairhist.append(pair.Lsb)
-
-        pairhist.append(self.status.loopcount >> 8)
-        pairhist.append(self.status.loopcount & 0xFF)
-        pairhist.append(self.status.resetsalltime >> 8)
-        pairhist.append(self.status.resetsalltime & 0xFF)
-        pairhist.append(self.status.batv_resetcause >> 8)
-        pairhist.append(self.status.batv_resetcause & 0xFF)
-        pairhist.append(self.endmarkerpos >> 8)
-        pairhist.append(self.endmarkerpos & 0xFF)
+        # The pair bytes are followed by status data and the end marker position, each big-endian.
+        pairhist = self.pairbytes + HASH_TRAILER.pack(self.status.loopcount,
+                                                      self.status.resetsalltime,
+                                                      self.status.batv_resetcause,
+                                                      self.endmarkerpos)
 
         # Perform message authentication.
         calcHash, self.hashtype = self.__class__._gethash(pairhist, usehmac, secretkey)
@@ -194,8 +336,6 @@ class PairsURL(CircularBufferURL):
         if urlHash != calcHash:
             raise MessageIntegrityError(calcHash, urlHash)
 
-        assert self.npairs == len(self.pairs)
-
     @staticmethod
     def _gethash(message: bytearray, usehmac: bool, secretkey: str):
         """
@@ -218,9 +358,9 @@ class PairsURL(CircularBufferURL):
             The hash algorithm used.
 
         """
-        secretkeyba = bytearray(secretkey, 'utf8')
         if usehmac:
-            hmacobj = hmac.new(secretkeyba, message, "md5")
+            hmacobj = _keyed_hmac(secretkey).copy()
+            hmacobj.update(message)
             digest = hmacobj.hexdigest()
             hashtype = HashType.HMAC_MD5
         else:
@@ -228,80 +368,164 @@ class PairsURL(CircularBufferURL):
             hashtype = HashType.MD5
         return digest, hashtype
 
+    @instrumented('pairs', count=lambda self, _: self.npairs)
     def _decode_pairs(self):
         """
-        The payload string is converted into a list of 8-byte demis (see :ref:`demi`).
+        The decoded payload is reordered into :attr:`pairbytes`: the 3 bytes of each valid pair concatenated,
+        newest pair first.
 
-        The first demi is the newest; its data have been written to the circular buffer most recently,
-        so it closest to the left of the endstop. It can contain either one or two pairs.
-        This is decoded first.
+        The payload is a list of demis (see :ref:`demi`), oldest first. Each is 6 bytes long after base64 decoding
+        and contains 2 pairs. The newest demi is closest to the left of the endstop. It can contain either one or two
+        valid pairs. When it contains one, only its first pair is valid.
 
-        Subsequent (older) demis each contain 2 pairs. These are decoded. The final list of pairs is in
+        Subsequent (older) demis each contain 2 valid pairs. Within each demi the second pair is newer than the first.
+        Reading the payload backwards, one pair at a time, from the newest valid pair gives the pairs in
         chronological order with the newest first and the oldest last.
+
+        The payload is read from the segments returned by :meth:`payload_segments`, so it is never copied whole.
+        """
+        newest = self.payloadlen // BYTES_PER_PAIR - 1 - (self.npairs % PAIRS_PER_DEMI)
+        oldest = newest - self.npairs + 1
+        if oldest < 0:
+            raise InvalidCircularBufferError(self.circb64, "the endstop holds {} pairs, but there is only room for "
+                                                           "{}".format(self.npairs, newest + 1))
+
+        pairbytes = bytearray(self.npairs * BYTES_PER_PAIR)
+        # Index of the first pair in each segment, counted from the start of the linearised payload.
+        segmentstart = 0
+        for segment in self.payload_segments():
+            segmentpairs = len(segment) // BYTES_PER_PAIR
+            first = max(oldest, segmentstart)
+            last = min(newest, segmentstart + segmentpairs - 1)
+
+            if first <= last:
+                count = last - first + 1
+                outstart = (newest - last) * BYTES_PER_PAIR
+                outstop = outstart + count * BYTES_PER_PAIR
+                # Reverse the order of pairs, but not the order of bytes within each pair. Every third byte is
+                # sliced backwards from each byte of the last pair. These slices are interleaved back together.
+                for i in range(BYTES_PER_PAIR):
+                    start = (last - segmentstart) * BYTES_PER_PAIR + i
+                    stop = start - count * BYTES_PER_PAIR
+                    pairbytes[outstart + i:outstop:BYTES_PER_PAIR] = \
+                        segment[start:stop if stop >= 0 else None:-BYTES_PER_PAIR]
+
+            segmentstart += segmentpairs
+
+        self.pairbytes = bytes(pairbytes)
+
+    def get_readings(self, npairs: int = None):
         """
-        self.pairs = list()
 
-        # Convert payload string into 8 byte demis.
-        demis = self._dividestring(self.payloadstr, BYTES_PER_DEMI)
+        Parameters
+        ----------
+        npairs : int
+            Only decode readings from this many of the newest pairs. Defaults to all pairs.
 
-        # The newest 8 byte demi might only contain 1 valid pair.
-        # If so, it is a partial one so it gets processed first.
-        partial = self.npairs % PAIRS_PER_DEMI
-        full = int(self.npairs / PAIRS_PER_DEMI)
+        Returns
+        -------
+        Two columns of 12-bit readings: rd0 and rd1 of each pair, starting with the newest pair. These are NumPy arrays
+        when usenumpy is True or array.array otherwise.
+        """
+        if self.usenumpy:
+            return self.pairs.rd0[:npairs], self.pairs.rd1[:npairs]
 
-        if partial != 0:
-            demi = demis.pop()
-            pair = self._pairsfromdemi(demi)[1]  # Only append the oldest pair, for the newest is invalid.
-            self.pairs.append(pair)
+        end = None if npairs is None else npairs * BYTES_PER_PAIR
+        rd0MSB = self.pairbytes[0:end:BYTES_PER_PAIR]
+        rd1MSB = self.pairbytes[1:end:BYTES_PER_PAIR]
+        Lsb = self.pairbytes[2:end:BYTES_PER_PAIR]
 
-        # Process remaining full demis. These all contain 2 pairs.
-        for i in range(0, full, 1):
-            demi = demis.pop()
-            demipairs = self._pairsfromdemi(demi)  # Append both pairs.
-            self.pairs.extend(demipairs)
+        rd0 = array('H', ((msb << 4) | (lsb >> 4) for msb, lsb in zip(rd0MSB, Lsb)))
+        rd1 = array('H', ((msb << 4) | (lsb & 0xF) for msb, lsb in zip(rd1MSB, Lsb)))
+        return rd0, rd1
 
-    @staticmethod
-    def _dividestring(source: str, n: int):
+    def get_readings_interleaved(self, unwritten: int, npairs: int = None):
         """
+        This is for formats that store consecutive samples in reading1 and then reading0 of each pair.
 
         Parameters
         ----------
-        source : str
-            The string to be divided.
-        n
-            The number of characters in each substring.
+        unwritten : int
+            Value of a reading1 that has not been written yet.
+        npairs : int
+            Only decode readings from this many of the newest pairs. Defaults to all pairs.
 
         Returns
         -------
-        A list of substrings, each containing n characters.
-
+        One column of 12-bit readings, newest first. Unwritten readings are left out.
         """
-        return list(source[i:i+n] for i in range(0, len(source), n))
-
-    def _pairsfromdemi(self, demi: str) -> List[Pair]:
+        if self.usenumpy:
+            return self._window_pairs(npairs).interleaved(unwritten)
+
+        readings = array('H')
+        for rd0, rd1 in self.iter_readings(npairs):
+            if rd1 != unwritten:
+                readings.append(rd1)
+            readings.append(rd0)
+        return readings
+
+    def _window_pairs(self, npairs: int = None):
+        # Slicing a PairArray rebuilds its readings, so the whole array is returned as it is.
+        if npairs is None or npairs >= len(self.pairs):
+            return self.pairs
+        return self.pairs[:npairs]
+
+    def iter_readings(self, npairs: int = None):
         """
-        Decode a demi into 2 pairs.
+        Readings are decoded one pair at a time, so no list of pairs is created.
 
         Parameters
         ----------
-        demi : str
-            A string containing 8 base64 characters.
+        npairs : int
+            Stop after this many of the newest pairs. Defaults to all pairs.
 
-        Returns
+        Yields
         -------
-        A list of 2 pairs:
-            Element 0 is the oldest pair, decoded from the first 4 demi characters.
-            Element 1 is the newest pair, decoded from the last 4 demi characters.
-
+        Both 12-bit readings of each pair as a (rd0, rd1) tuple, starting with the newest pair.
         """
-        pairs = list()
+        if self.usenumpy:
+            yield from self._window_pairs(npairs).readings()
+            return
+
+        pairbytes = self.pairbytes
+        end = len(pairbytes) if npairs is None else min(len(pairbytes), npairs * BYTES_PER_PAIR)
+        for i in range(0, end, BYTES_PER_PAIR):
+            rd0MSB, rd1MSB, Lsb = pairbytes[i:i+BYTES_PER_PAIR]
+            yield (rd0MSB << 4) | (Lsb >> 4), (rd1MSB << 4) | (Lsb & 0xF)
+
+
+@lru_cache(maxsize=HMAC_CACHE_SIZE)
+def _keyed_hmac(secretkey: str):
+    """
+    The inner and outer padded key blocks of HMAC depend only on the secret key. They are calculated once per key and
+    kept in an LRU cache. Each message is hashed with a copy of the cached object.
+
+    Parameters
+    ----------
+    secretkey : str
+        HMAC secret key as a string.
 
-        assert len(demi) == BYTES_PER_DEMI, demi
+    Returns
+    -------
+    An HMAC-MD5 object that has been initialised with the secret key and no message.
 
-        for i in range(0, BYTES_PER_DEMI, BYTES_PER_PAIRB64):
-            pairb64 = demi[i:i+BYTES_PER_PAIRB64]
-            pair = Pair.from_b64(pairb64)
-            pairs.append(pair)
+    """
+    return hmac.new(bytearray(secretkey, 'utf8'), digestmod="md5")
+
+
+def hmac_cache_info():
+    """
+
+    Returns
+    -------
+    A named tuple of hits, misses, maxsize and currsize for the cache of keyed HMAC objects.
 
-        pairs.reverse()
-        return pairs
\ No newline at end of file
+    """
+    return _keyed_hmac.cache_info()
+
+
+def hmac_cache_clear():
+    """
+    Remove all secret keys from the cache of keyed HMAC objects and reset its counters.
+    """
+    _keyed_hmac.cache_clear()
@@ -0,0 +1,87 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+from typing import Iterable
+from .decoderfactory import decode
+from .serialise import from_bytes
+
+
+def decode_many(params: Iterable[dict], workers: int = None, chunksize: int = 64) -> list:
+    """
+    Decode many URLs by fanning them out across a pool of worker processes.
+
+    URLs are sent to the workers in chunks, which reduces the inter-process communication overhead per URL. Each
+    worker sends back a decoded URL serialised with :func:`wscodec.decoder.serialise.to_bytes`, which holds the pair
+    bytes but not the URL strings or the circular buffer. It is restored with
+    :func:`wscodec.decoder.serialise.from_bytes`, so its circular buffer attributes are None. URLs decoded in the
+    calling process take the same path, so the results do not depend on the number of workers.
+
+    Parameters
+    -----------
+    params: Iterable[dict]
+        Each element is a dictionary of keyword arguments for :func:`decode`, for example `secretkey`, `statb64`,
+        `timeintb64`, `circb64` and `vfmtb64`.
+
+    workers: int
+        Number of worker processes. Defaults to the number of CPUs. When this is 1, all URLs are decoded in the calling
+        process.
+
+    chunksize: int
+        Number of URLs sent to a worker at once.
+
+    Returns
+    --------
+    list
+        One element per element of params, in the same order. This is either a decoded object or the exception
+        raised while decoding.
+
+    """
+    # Each element is read again when its result is restored.
+    params = list(params)
+
+    if workers == 1:
+        results = [_decode_serialised(urlparams) for urlparams in params]
+    else:
+        # Imported here so that the multiprocessing machinery is not loaded with the decoder.
+        from concurrent.futures import ProcessPoolExecutor
+
+        # The decoder version lookup is cached, so each worker warms up on the first URL it decodes.
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_decode_serialised, params, chunksize=chunksize))
+
+    return [_restore(result, urlparams) for result, urlparams in zip(results, params)]
+
+
+def _decode_serialised(urlparams: dict):
+    try:
+        return decode(**urlparams).to_bytes()
+    except Exception as error:
+        return error
+
+
+def _restore(result, urlparams: dict):
+    if isinstance(result, Exception):
+        return result
+    # Whether to use NumPy is not serialised, so the caller's choice is passed back in.
+    return from_bytes(result, usenumpy=urlparams.get('usenumpy', False))
@@ -0,0 +1,200 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+import hashlib
+import sys
+import time
+from .decoderfactory import decode
+from .samples import SamplesURL
+
+
+class DecodeCache:
+    """
+    A bounded cache of decoded URLs in front of :func:`decode`.
+
+    The same URL is often submitted more than once, for example when a phone app retries or a tag is scanned again
+    before it has taken a new sample. On a cache hit the URL is not decoded or verified again. Only the timestamps are
+    recalculated relative to the new scantimestamp (see :meth:`SamplesURL.restamp`). The sample window is applied
+    after that (see :meth:`SamplesURL.with_window`), so one entry serves every window.
+
+    Entries are keyed by a digest of the URL parameters, usehmac and a key identifier. Least recently used entries are
+    evicted when either maxentries or maxbytes is exceeded. Decoding errors are never cached.
+
+    Parameters
+    ----------
+    maxentries : int
+        Maximum number of decoded URLs in the cache.
+    maxbytes : int
+        Maximum approximate size of all cached entries in bytes.
+    ttl : float
+        Seconds after which an entry expires. None if entries do not expire.
+    """
+    def __init__(self, maxentries: int = 1024, maxbytes: int = 16 * 1024 * 1024, ttl: float = None):
+        self.maxentries = maxentries
+        self.maxbytes = maxbytes
+        self.ttl = ttl
+
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self._nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def decode(self,
+               secretkey: str,
+               statb64: str,
+               timeintb64: str,
+               circb64: str,
+               vfmtb64: str,
+               usehmac: bool = True,
+               scantimestamp: datetime = None,
+               usenumpy: bool = False,
+               keyid: str = None,
+               newest: int = None,
+               since: datetime = None) -> SamplesURL:
+        """
+        Return a cached decode of the URL if there is one. Otherwise call :func:`decode` and cache the result.
+
+        Parameters
+        -----------
+        secretkey, statb64, timeintb64, circb64, vfmtb64, usehmac, scantimestamp, usenumpy:
+            As for :func:`decode`.
+
+        keyid: str
+            Identifies the secret key in the cache key, for example by a key version or the tag serial. When None
+            a digest of the secret key is used.
+
+        newest, since:
+            As for :func:`decode`. These are not part of the cache key.
+
+        Returns
+        --------
+        SamplesURL
+            An object containing a list of timestamped environmental sensor samples.
+
+        """
+        if keyid is None:
+            keyid = hashlib.md5(bytearray(secretkey or '', 'utf8')).hexdigest()
+
+        cachekey = self._cachekey(statb64, timeintb64, circb64, vfmtb64, usehmac, usenumpy, keyid)
+
+        with self._lock:
+            entry = self._entries.get(cachekey)
+            if entry is not None:
+                decoded, nbytes, expiry = entry
+                if expiry is not None and expiry <= time.monotonic():
+                    self._remove(cachekey)
+                    self.expirations += 1
+                else:
+                    self._entries.move_to_end(cachekey)
+                    self.hits += 1
+                    # The since window depends on the new timestamps, so it is applied after restamping.
+                    return decoded.restamp(scantimestamp).with_window(newest, since)
+            self.misses += 1
+
+        decoded = decode(secretkey=secretkey, statb64=statb64, timeintb64=timeintb64, circb64=circb64,
+                         vfmtb64=vfmtb64, usehmac=usehmac, scantimestamp=scantimestamp, usenumpy=usenumpy,
+                         newest=newest, since=since)
+
+        # Cache a copy without samples, because these depend on the scan time.
+        template = decoded.restamp(decoded.scantimestamp)
+        nbytes = self._sizeof(template)
+        expiry = None if self.ttl is None else time.monotonic() + self.ttl
+
+        with self._lock:
+            if cachekey in self._entries:
+                self._remove(cachekey)
+            if nbytes <= self.maxbytes:
+                self._entries[cachekey] = (template, nbytes, expiry)
+                self._nbytes += nbytes
+                self._evict()
+
+        return decoded
+
+    def stats(self) -> dict:
+        """
+
+        Returns
+        -------
+        Cache statistics as a dictionary.
+        """
+        with self._lock:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions,
+                    'expirations': self.expirations,
+                    'entries': len(self._entries),
+                    'bytes': self._nbytes}
+
+    def clear(self):
+        """
+        Remove all entries. Statistics are not reset.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self):
+        while len(self._entries) > self.maxentries or self._nbytes > self.maxbytes:
+            cachekey = next(iter(self._entries))
+            self._remove(cachekey)
+            self.evictions += 1
+
+    def _remove(self, cachekey):
+        decoded, nbytes, expiry = self._entries.pop(cachekey)
+        self._nbytes -= nbytes
+
+    @staticmethod
+    def _cachekey(*fields) -> bytes:
+        digest = hashlib.blake2b(digest_size=16)
+        for field in fields:
+            if isinstance(field, (bytes, bytearray, memoryview)):
+                digest.update(field)
+            else:
+                digest.update(str(field).encode('utf8'))
+            digest.update(b'\0')
+        return digest.digest()
+
+    @staticmethod
+    def _sizeof(decoded: SamplesURL) -> int:
+        """
+
+        Returns
+        -------
+        The approximate size of a decoded URL in bytes. Only the object, its attribute dictionary and strings or bytes
+        referenced directly by it are counted.
+        """
+        nbytes = sys.getsizeof(decoded) + sys.getsizeof(decoded.__dict__)
+        for value in decoded.__dict__.values():
+            if isinstance(value, (str, bytes)):
+                nbytes += sys.getsizeof(value)
+        return nbytes
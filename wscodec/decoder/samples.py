@@ -22,9 +22,59 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 
-from .pairs import PairsURL
-from .b64decode import B64Decoder
+from .pairs import PairsURL, import_numpy
+from .instrumentation import instrumented
+from .b64decode import B64Decoder, immutable
 from datetime import timedelta, timezone, datetime
+from array import array
+from itertools import islice
+import copy
+import math
+import operator
+
+
+def epoch_seconds(timestamp: datetime) -> int:
+    """
+
+    Parameters
+    ----------
+    timestamp : datetime
+        A timezone aware datetime. A naive datetime is assumed to be in UTC.
+
+    Returns
+    -------
+    Whole seconds since the Unix epoch, rounded down.
+
+    """
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return math.floor(timestamp.timestamp())
+
+
+def epoch_range(newest_epoch: int, interval_s: int, count: int, usenumpy: bool = False):
+    """
+    Calculate evenly spaced timestamps in one step, instead of creating one datetime object per sample.
+
+    Parameters
+    ----------
+    newest_epoch : int
+        Timestamp of the newest sample in seconds since the Unix epoch.
+    interval_s : int
+        Time between consecutive samples in seconds.
+    count : int
+        Number of timestamps.
+    usenumpy : bool
+        Return a numpy.ndarray of int64 instead of an array.array.
+
+    Returns
+    -------
+    Timestamps in seconds since the Unix epoch, newest first.
+
+    """
+    if usenumpy:
+        np = import_numpy("calculate timestamps as a numpy.ndarray")
+        return newest_epoch - np.arange(count, dtype=np.int64) * interval_s
+    return array('q', (newest_epoch - index * interval_s for index in range(count)))
 
 
 class Sample:
@@ -42,6 +92,242 @@ class Sample:
         self.timestamp = timestamp
 
 
+class LookupTable:
+    """
+    Conversion from a raw reading to real units, calculated in advance for every possible reading.
+
+    Converting a reading becomes a table lookup instead of floating point arithmetic. The table can be indexed with
+    an int, or with a numpy.ndarray of readings to convert all of them in one step. An int reading outside the range
+    0 to 2**bits - 1 raises ValueError.
+
+    Parameters
+    ----------
+    func
+        Function that converts one reading.
+    bits : int
+        Width of a raw reading. The table contains 2**bits entries.
+    """
+    def __init__(self, func, bits: int = 12):
+        self.func = func
+        self.bits = bits
+        self.values = array('d', map(func, range(1 << bits)))
+        self._ndarray = None
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, reading):
+        try:
+            index = operator.index(reading)
+        except TypeError:
+            # Not a single integer, so index the NumPy array with it.
+            return self.asarray()[reading]
+
+        if not 0 <= index < len(self.values):
+            raise ValueError(
+                "Reading {} is outside the range 0 to {}.".format(reading, len(self.values) - 1)
+            )
+        return self.values[index]
+
+    def __call__(self, reading):
+        return self[reading]
+
+    def asarray(self):
+        """
+
+        Returns
+        -------
+        The table as a numpy.ndarray of float64. It is created on first access.
+        """
+        if self._ndarray is None:
+            np = import_numpy("index a LookupTable with an array")
+            self._ndarray = np.frombuffer(self.values, dtype=np.float64)
+        return self._ndarray
+
+    def convert(self, column):
+        """
+
+        Parameters
+        ----------
+        column : array.array or numpy.ndarray
+            Raw readings.
+
+        Returns
+        -------
+        A column of converted readings, with the same type as the input column.
+        """
+        if isinstance(column, array):
+            return array('d', map(self.values.__getitem__, column))
+        return self.asarray()[column]
+
+
+class SampleBatch:
+    """
+    Decoded samples held as parallel columns instead of one :class:`Sample` object per reading.
+
+    Each raw column holds integer ADC readings. Each converted column holds the same readings in real units. Converted
+    columns are only calculated when they are first accessed. Samples are in newest-first order. Timestamps are not
+    stored; each is calculated relative to newest_timestamp.
+
+    A batch can be used in place of a list of samples. Indexing with an integer or iterating creates
+    sampletype objects. Indexing with a slice returns a new batch. Indexing with a string returns a column.
+
+    Parameters
+    ----------
+    sampletype : type
+        :class:`Sample` subclass created for each row. Its constructor takes the raw columns and a timestamp.
+    newest_timestamp : datetime
+        Timestamp of the first (newest) sample in the batch.
+    timeinterval : timedelta
+        Time between consecutive samples.
+    raw : dict
+        Raw columns as array.array or numpy.ndarray, keyed by sampletype constructor argument name.
+    converters : dict
+        Keyed by the name of a converted column, which is also the name of the equivalent sampletype attribute.
+        Each value is a tuple of the raw column name and a function or :class:`LookupTable` that converts one reading
+        (see :meth:`convert`). Nothing is converted until a converted column is accessed, so the raw columns
+        can be used on their own at no extra cost.
+    """
+    def __init__(self, sampletype: type, newest_timestamp: datetime, timeinterval: timedelta, raw: dict,
+                 converters: dict):
+        self.sampletype = sampletype
+        self.newest_timestamp = newest_timestamp
+        self.timeinterval = timeinterval
+        self.raw = raw
+        self.converters = converters
+        self._converted = dict()
+
+        lengths = set(len(column) for column in self.raw.values())
+        assert len(lengths) <= 1, lengths
+        self._len = lengths.pop() if lengths else 0
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, index):
+        if isinstance(index, str):
+            return self.column(index)
+
+        if isinstance(index, slice):
+            indices = range(self._len)[index]
+            batch = self.__class__(sampletype=self.sampletype,
+                                   newest_timestamp=self.newest_timestamp - indices.start * self.timeinterval,
+                                   timeinterval=self.timeinterval * indices.step,
+                                   raw={name: column[index] for name, column in self.raw.items()},
+                                   converters=self.converters)
+            batch._converted = {name: column[index] for name, column in self._converted.items()}
+            return batch
+
+        index = range(self._len)[index]
+        rawrow = {name: column[index] for name, column in self.raw.items()}
+        return self.sampletype(**self._tonative(rawrow), timestamp=self.newest_timestamp - index * self.timeinterval)
+
+    def __iter__(self):
+        names = list(self.raw.keys())
+        rawrows = zip(*(self.raw[name].tolist() for name in names))
+        for index, rawrow in enumerate(rawrows):
+            yield self.sampletype(**dict(zip(names, rawrow)),
+                                  timestamp=self.newest_timestamp - index * self.timeinterval)
+
+    @staticmethod
+    def _tonative(row: dict) -> dict:
+        # NumPy scalars are converted to int so that rows match those from the pure Python decoder.
+        return {name: int(value) for name, value in row.items()}
+
+    @property
+    def timestamps(self):
+        """
+
+        Returns
+        -------
+        A list containing the timestamp of each sample, newest first.
+        """
+        return [self.newest_timestamp - index * self.timeinterval for index in range(self._len)]
+
+    def epochs(self, datetime64: bool = False):
+        """
+        Timestamps calculated in one step, without creating a datetime object for each sample.
+
+        Parameters
+        ----------
+        datetime64 : bool
+            Return numpy.datetime64[s] values instead of integers. This requires NumPy.
+
+        Returns
+        -------
+        The timestamp of each sample in seconds since the Unix epoch, newest first. This is a numpy.ndarray when
+        the raw columns are NumPy arrays or datetime64 is True. Otherwise it is an array.array of signed 64-bit
+        integers.
+        """
+        usenumpy = datetime64 or any(not isinstance(column, array) for column in self.raw.values())
+        epochs = epoch_range(newest_epoch=epoch_seconds(self.newest_timestamp),
+                             interval_s=int(self.timeinterval.total_seconds()),
+                             count=self._len,
+                             usenumpy=usenumpy)
+        if datetime64:
+            return epochs.astype('datetime64[s]')
+        return epochs
+
+    @staticmethod
+    def convert(column, func):
+        """
+        Convert a column of raw readings into real units.
+
+        Parameters
+        ----------
+        column : array.array or numpy.ndarray
+            Raw readings.
+        func
+            A :class:`LookupTable`, or a function that converts one reading. A function must only use arithmetic
+            operators, so that it can also be applied to a whole NumPy array in one step.
+
+        Returns
+        -------
+        A column of converted readings, with the same type as the input column.
+        """
+        if isinstance(func, LookupTable):
+            return func.convert(column)
+        if isinstance(column, array):
+            return array('d', map(func, column))
+        return func(column)
+
+    @property
+    def converted(self) -> dict:
+        """
+        All converted columns in a dictionary, keyed by name. Any not accessed before are calculated now.
+        """
+        return {name: self.column(name) for name in self.converters}
+
+    def column(self, name: str):
+        """
+
+        Parameters
+        ----------
+        name : str
+            Name of a raw or converted column.
+
+        Returns
+        -------
+        The column. A converted column is calculated from its raw column on first access.
+        """
+        if name in self.raw:
+            return self.raw[name]
+
+        if name not in self._converted:
+            rawname, func = self.converters[name]
+            self._converted[name] = self.convert(self.raw[rawname], func)
+        return self._converted[name]
+
+    def columns(self) -> dict:
+        """
+
+        Returns
+        -------
+        All raw and converted columns in a dictionary, keyed by name.
+        """
+        return dict(self.raw, **self.converted)
+
+
 class SamplesURL(PairsURL):
     """
     This holds a list of decoded sensor samples. Each needs a timestamp, but this must be calculated. There
@@ -59,15 +345,43 @@ class SamplesURL(PairsURL):
     *args
         Variable length argument list
     timeintb64 : str
-        Time interval between samples in minutes, base64 encoded into a 4 character string.
+        Time interval between samples in minutes, base64 encoded into a 4 character string or bytes-like object.
     scantimestamp : datetime
         Time the tag was scanned. It corresponds to the time the URL on the tag is requested from the web server.
+    newest : int
+        Only create the newest N samples. Defaults to all samples.
+    since : datetime
+        Only create samples timestamped at or after this time. Defaults to all samples.
     **kwargs
         Keyword arguments to be passed to parent class constructors.
     """
-    def __init__(self, *args, timeintb64: str, scantimestamp: datetime = None, **kwargs):
+    #: Maximum number of samples stored in each pair. This is over-ridden by a child class.
+    SAMPLES_PER_PAIR = 1
+
+    def __init__(self, *args, timeintb64: str, scantimestamp: datetime = None, newest: int = None,
+                 since: datetime = None, **kwargs):
         super().__init__(*args, **kwargs)
-        self.timeintb64 = timeintb64
+        self._init_samples(timeintb64, scantimestamp, newest, since)
+
+    def _restore(self, *args, timeintb64: str, scantimestamp: datetime = None, newest: int = None,
+                 since: datetime = None, **kwargs):
+        """
+        See :meth:`CircularBufferURL.from_fields`.
+
+        Parameters
+        ----------
+        *args
+            Variable length argument list.
+        timeintb64, scantimestamp, newest, since
+            As for the constructor.
+        **kwargs
+            Keyword arguments to be passed to parent class methods.
+        """
+        super()._restore(*args, **kwargs)
+        self._init_samples(timeintb64, scantimestamp, newest, since)
+
+    def _init_samples(self, timeintb64: str, scantimestamp: datetime, newest: int, since: datetime):
+        self.timeintb64 = immutable(timeintb64)
         self.scantimestamp = scantimestamp or datetime.now(timezone.utc)
 
         # Calculates the time interval in minutes from a URL parameter.
@@ -78,8 +392,266 @@ class SamplesURL(PairsURL):
         self.timeinterval = timedelta(minutes=self.timeintmins_int)
         # Calculate the timestamp of the newest sample
         self.newest_timestamp = self.scantimestamp - timedelta(minutes=self.elapsedmins)
-        # Define an empty list to hold samples.
-        self.samples = list()
+        # The HMAC has been verified over every pair, but samples are only created inside this window.
+        self.maxsamples = self._window_size(newest, since)
+        # Samples and sample columns are created on first access.
+        self._samples = None
+        self._batch = None
+
+    def __getstate__(self):
+        # Samples are recreated from pairbytes when they are needed, so leave them out of the pickled state.
+        state = super().__getstate__()
+        state['_samples'] = None
+        state['_batch'] = None
+        return state
+
+    def restamp(self, scantimestamp: datetime = None):
+        """
+        Nothing is decoded or verified again, so this is much faster than decoding the same URL with a new
+        scantimestamp. The number of samples in the window is not changed.
+
+        Parameters
+        ----------
+        scantimestamp : datetime
+            Time the tag was scanned. Defaults to now.
+
+        Returns
+        -------
+        A copy of this object with all samples timestamped relative to scantimestamp.
+
+        """
+        # Copying goes through __getstate__, so cached samples with the old timestamps are left out.
+        restamped = copy.copy(self)
+        restamped.scantimestamp = scantimestamp or datetime.now(timezone.utc)
+        restamped.newest_timestamp = restamped.scantimestamp - timedelta(minutes=self.elapsedmins)
+        return restamped
+
+    def with_window(self, newest: int = None, since: datetime = None):
+        """
+        Nothing is decoded or verified again. The window is worked out from scratch, so a previous window is replaced.
+
+        Parameters
+        ----------
+        newest : int
+            Only create the newest N samples. Defaults to all samples.
+        since : datetime
+            Only create samples timestamped at or after this time. Defaults to all samples.
+
+        Returns
+        -------
+        A copy of this object with samples created only inside the new window.
+
+        """
+        # Copying goes through __getstate__, so samples created for the old window are left out.
+        windowed = copy.copy(self)
+        windowed.maxsamples = windowed._window_size(newest, since)
+        return windowed
+
+    def to_bytes(self) -> bytes:
+        """
+
+        Returns
+        -------
+        This URL serialised into a compact binary record. See :func:`wscodec.decoder.serialise.to_bytes`.
+
+        """
+        # Imported here, because serialise imports the decoder classes that derive from this one.
+        from .serialise import to_bytes
+        return to_bytes(self)
+
+    def _window_size(self, newest: int = None, since: datetime = None):
+        """
+        Count the samples inside the window from their timestamps alone, without creating any of them.
+
+        Parameters
+        ----------
+        newest : int
+            Only count the newest N samples.
+        since : datetime
+            Only count samples timestamped at or after this time.
+
+        Returns
+        -------
+        The maximum number of samples to create, or None to create all of them.
+
+        """
+        if newest is not None and newest < 0:
+            raise ValueError("newest must not be negative, but it is {}".format(newest))
+
+        maxsamples = newest
+        if since is not None:
+            if since > self.newest_timestamp:
+                insince = 0
+            elif self.timeinterval:
+                insince = (self.newest_timestamp - since) // self.timeinterval + 1
+            else:
+                # Every sample has the same timestamp as the newest one.
+                insince = None
+
+            if insince is not None and (maxsamples is None or insince < maxsamples):
+                maxsamples = insince
+
+        return maxsamples
+
+    def _window_npairs(self):
+        """
+        Only the newest pair can hold fewer than SAMPLES_PER_PAIR samples, so this many pairs are enough to fill the
+        window.
+
+        Returns
+        -------
+        The number of pairs to decode samples from, or None to decode all of them.
+
+        """
+        if self.maxsamples is None:
+            return None
+        samplesperpair = self.SAMPLES_PER_PAIR
+        return min(self.npairs, (self.maxsamples + 2 * samplesperpair - 2) // samplesperpair)
+
+    @property
+    def samples(self):
+        """
+        A list of all samples inside the window, newest first. It is created on first access.
+        """
+        if self._samples is None:
+            self._samples = self._list_samples()
+        return self._samples
+
+    @property
+    def batch(self):
+        """
+        All samples as a :class:`SampleBatch`. It is created on first access.
+        """
+        if self._batch is None:
+            self._batch = self._timed_build_batch()
+        return self._batch
+
+    @property
+    def nsamples(self) -> int:
+        """
+        The number of samples inside the window. These are counted without being created when possible.
+        """
+        nstored = self._count_samples()
+        if nstored is None:
+            return len(self.samples)
+        if self.maxsamples is None:
+            return nstored
+        return min(nstored, self.maxsamples)
+
+    def _count_samples(self):
+        """
+        Count every sample stored in the URL. This is over-ridden by a child class that can count samples without
+        creating them.
+
+        Returns
+        -------
+        The number of samples, or None if they must be created to be counted.
+        """
+        return None
+
+    @instrumented('samples', count=lambda self, samples: len(samples))
+    def _list_samples(self):
+        return list(self.iter_samples())
+
+    @instrumented('batch', count=lambda self, batch: len(batch) if batch is not None else None)
+    def _timed_build_batch(self):
+        # Child classes over-ride _build_batch, so it is timed through this method.
+        batch = self._build_batch()
+        # Columns are built from whole pairs, so the oldest pair in the window may add one sample too many.
+        if batch is not None and self.maxsamples is not None and len(batch) > self.maxsamples:
+            batch = batch[:self.maxsamples]
+        return batch
+
+    def iter_samples(self):
+        """
+        Samples are created one at a time as they are needed. The full list of samples is not created, unless it
+        exists already.
+
+        Yields
+        -------
+        Each sample, starting with the newest.
+
+        """
+        if self._samples is not None:
+            return iter(self._samples)
+        return self._generate_samples()
+
+    def iter_pair_samples(self):
+        """
+        Samples are created one pair at a time as they are needed.
+
+        Yields
+        -------
+        A list of the samples decoded from each pair, starting with the newest pair. The oldest pair in the window
+        may be cut short.
+
+        """
+        timestamp_gen = self.generate_timestamp()
+        remaining = self.maxsamples
+
+        for rd0, rd1 in self.iter_readings(self._window_npairs()):
+            if remaining == 0:
+                return
+            pairsamples = list(islice(self._pair_samples(rd0, rd1, timestamp_gen), remaining))
+            if remaining is not None:
+                remaining -= len(pairsamples)
+            yield pairsamples
+
+    def _generate_samples(self):
+        """
+        Create samples from pairs, newest first. Pairs outside the window are not decoded.
+        """
+        timestamp_gen = self.generate_timestamp()
+
+        samples = (sample for rd0, rd1 in self.iter_readings(self._window_npairs())
+                   for sample in self._pair_samples(rd0, rd1, timestamp_gen))
+        yield from islice(samples, self.maxsamples)
+
+    def _pair_samples(self, rd0: int, rd1: int, timestamp_gen):
+        """
+        Create the samples stored in one pair, newest first. This is over-ridden by a child class.
+
+        Parameters
+        ----------
+        rd0 : int
+            Reading 0 of the pair.
+        rd1 : int
+            Reading 1 of the pair.
+        timestamp_gen
+            Generator that returns the timestamp of each sample in turn. See :meth:`generate_timestamp`.
+        """
+        return iter(())
+
+    def _build_batch(self):
+        """
+        Create a :class:`SampleBatch` from pairs. This is over-ridden by a child class.
+        """
+        return None
+
+    def get_sample_batch(self) -> SampleBatch:
+        """
+
+        Returns
+        -------
+        All samples inside the window as columns of raw readings, converted readings and timestamps.
+
+        """
+        return self.batch
+
+    def get_epochs(self, datetime64: bool = False):
+        """
+
+        Parameters
+        ----------
+        datetime64 : bool
+            Return numpy.datetime64[s] values instead of integers. This requires NumPy.
+
+        Returns
+        -------
+        The timestamp of each sample in seconds since the Unix epoch, newest first. See :meth:`SampleBatch.epochs`.
+
+        """
+        return self.batch.epochs(datetime64=datetime64)
 
     def get_samples_list(self):
         """
@@ -0,0 +1,150 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+from base64 import urlsafe_b64encode
+from datetime import datetime, timedelta, timezone
+from struct import Struct
+from .b64decode import B64Decoder
+from .decoderfactory import DECODERS, _get_decoder
+from .exceptions import InvalidFormatError
+from .pairs import HashType, BYTES_PER_PAIR
+from .samples import SamplesURL
+from .status import STATUS_STRUCT
+
+SERIAL_MAGIC = b'CU'                                #: First 2 bytes of every serialised URL.
+SERIAL_VERSION = 2                                  #: Version of the serialised format.
+#: Magic, version, format code, loop count, resets all time, battery voltage and reset cause, end marker position,
+#: number of pairs, elapsed minutes, time interval minutes, scan time in microseconds since the Unix epoch,
+#: flags, hash, hash type and the maximum number of samples in the window. The pair bytes follow.
+SERIAL_HEADER = Struct(">2sBBHHHHHHHqB7sBI")
+FLAG_TZAWARE = 0x01                                 #: Set when scantimestamp is timezone aware.
+NO_WINDOW = 0xFFFFFFFF                              #: Maximum number of samples when every sample is in the window.
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_bytes(decoded: SamplesURL) -> bytes:
+    """
+    Serialise a decoded URL into a compact binary record. This holds a fixed size header and the 3 bytes of each
+    pair, which pack both 12-bit readings. The URL strings, pairs and samples are left out, because they can be
+    recreated from the pair bytes. Every pair is kept, but the sample window is kept too.
+
+    Parameters
+    ----------
+    decoded : SamplesURL
+        A URL returned by :func:`wscodec.decoder.decode`.
+
+    Returns
+    -------
+    bytes
+        The serialised URL. See :data:`SERIAL_HEADER`.
+
+    """
+    formatcode = next((code for code, decoder in DECODERS.items() if type(decoded) is decoder), None)
+    if formatcode is None:
+        raise InvalidFormatError(type(decoded).__name__, "Only the decoder classes in DECODERS can be serialised, "
+                                                         "not {}.".format(type(decoded).__name__))
+
+    scantimestamp = decoded.scantimestamp
+    flags = 0
+    if scantimestamp.tzinfo is None:
+        scantimestamp = scantimestamp.replace(tzinfo=timezone.utc)
+    else:
+        flags |= FLAG_TZAWARE
+
+    header = SERIAL_HEADER.pack(SERIAL_MAGIC,
+                                SERIAL_VERSION,
+                                formatcode,
+                                decoded.status.loopcount,
+                                decoded.status.resetsalltime,
+                                decoded.status.batv_resetcause,
+                                decoded.endmarkerpos,
+                                decoded.npairs,
+                                decoded.elapsedmins,
+                                decoded.timeintmins_int,
+                                (scantimestamp - _EPOCH) // _MICROSECOND,
+                                flags,
+                                bytes.fromhex(decoded.hash),
+                                decoded.hashtype.value,
+                                NO_WINDOW if decoded.maxsamples is None else decoded.maxsamples)
+    return header + decoded.pairbytes
+
+
+def from_bytes(data, usenumpy: bool = False) -> SamplesURL:
+    """
+    Recreate a decoded URL from the output of :func:`to_bytes`. The header is unpacked in place and the pair bytes
+    are copied once. Nothing is base64 decoded or hashed again.
+
+    Parameters
+    ----------
+    data : bytes-like object
+        A serialised URL.
+    usenumpy : bool
+        True to hold the pairs in a :class:`PairArray`, as for :func:`wscodec.decoder.decode`. This is not serialised.
+
+    Returns
+    -------
+    SamplesURL
+        An object of the same class as the URL that was serialised, with the same sample window. It is created with
+        :meth:`CircularBufferURL.from_fields`, so its circular buffer attributes are None.
+
+    """
+    view = memoryview(data)
+    if len(view) < SERIAL_HEADER.size:
+        raise ValueError("Serialised URL is shorter than its header.")
+
+    (magic, version, formatcode, loopcount, resetsalltime, batv_resetcause, endmarkerpos, npairs, elapsedmins,
+     timeintmins, scanmicros, flags, hashbytes, hashtype, maxsamples) = SERIAL_HEADER.unpack_from(view)
+
+    if magic != SERIAL_MAGIC:
+        raise ValueError("Data is not a serialised URL.")
+    if version != SERIAL_VERSION:
+        raise ValueError("Unsupported serialised URL version = {}.".format(version))
+
+    pairbytes = view[SERIAL_HEADER.size:].tobytes()
+    if len(pairbytes) != npairs * BYTES_PER_PAIR:
+        raise ValueError("Expected {} pair bytes, found {}.".format(npairs * BYTES_PER_PAIR, len(pairbytes)))
+
+    scantimestamp = _EPOCH + scanmicros * _MICROSECOND
+    if not flags & FLAG_TZAWARE:
+        scantimestamp = scantimestamp.replace(tzinfo=None)
+
+    return _get_decoder(formatcode).from_fields(statb64=_b64encode(STATUS_STRUCT.pack(loopcount, resetsalltime,
+                                                                              batv_resetcause)),
+                                                endmarkerpos=endmarkerpos,
+                                                npairs=npairs,
+                                                elapsedmins=elapsedmins,
+                                                hash=hashbytes.hex(),
+                                                pairbytes=pairbytes,
+                                                hashtype=HashType(hashtype),
+                                                timeintb64=_b64encode(timeintmins.to_bytes(2, byteorder='little')),
+                                                scantimestamp=scantimestamp,
+                                                newest=None if maxsamples == NO_WINDOW else maxsamples,
+                                                usenumpy=usenumpy)
+
+
+def _b64encode(data: bytes) -> str:
+    b64string = urlsafe_b64encode(data).decode('ascii')
+    return b64string.replace(B64Decoder.RFC3548_PADDING_BYTE, B64Decoder.URLSAFE_PADDING_BYTE)
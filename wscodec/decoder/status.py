@@ -22,8 +22,13 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 
-from .b64decode import B64Decoder
+from .b64decode import B64Decoder, to_ascii_bytes
+from .exceptions import InvalidStatusError
+from array import array
+from functools import lru_cache
+from typing import NamedTuple
 import struct
+import sys
 
 BIT0 = 0x01
 BIT1 = 0x02
@@ -42,41 +47,78 @@ LPM5WU_BIT = BIT4
 CLOCKFAIL_BIT = BIT5
 SCANTIMEOUT_BIT = BIT7
 
+#: Name of each reset cause and its bit in the reset cause byte.
+RESETCAUSE_BITS = (("brownout", BOR_BIT),
+                   ("supervisor", SVSH_BIT),
+                   ("watchdog", WDT_BIT),
+                   ("misc", MISC_BIT),
+                   ("lpm5wakeup", LPM5WU_BIT),
+                   ("clockfail", CLOCKFAIL_BIT),
+                   ("scantimeout", SCANTIMEOUT_BIT))
+
+STATUS_STRUCT = struct.Struct("HHH")        #: Loop count, resets all time, battery voltage and reset cause.
+STATUS_B64_LEN = 8                          #: The number of characters in a base64 encoded status string.
+#: Characters of the URL safe base64 alphabet. A status string has no padding.
+URLSAFE_B64_ALPHABET = b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_'
+STATUS_CACHE_SIZE = 1024                    #: The number of status strings in the decoded status cache.
+
 
 class Status:
     """
         Decode the status string.
 
+        Status objects are shared between URLs by :meth:`from_b64`, so they must not be modified.
+
         Parameters
         -----------
         statb64:
-            Value of the URL parameter that holds status information (after base64 encoding).
+            Value of the URL parameter that holds status information (after base64 encoding). This is a str or
+            bytes-like object.
 
     """
+    __slots__ = ('statb64', 'loopcount', 'resetsalltime', 'batv_resetcause', '_resetcause')
+
     def __init__(self, statb64: str):
+        self.statb64 = statb64
         decstr = B64Decoder.b64decode(statb64)
-        declist = struct.unpack("HHH", decstr)
-        self.loopcount = declist[0]
-        self.resetsalltime = declist[1]
-        self.batv_resetcause = declist[2]
-
-        brownout = (self.get_resetcauseraw() & BOR_BIT) > 0
-        supervisor = (self.get_resetcauseraw() & SVSH_BIT) > 0
-        watchdog = (self.get_resetcauseraw() & WDT_BIT) > 0
-        misc = (self.get_resetcauseraw() & MISC_BIT) > 0
-        lpm5wakeup = (self.get_resetcauseraw() & LPM5WU_BIT) > 0
-        clockfail = (self.get_resetcauseraw() & CLOCKFAIL_BIT) > 0
-        scantimeout = (self.get_resetcauseraw() & SCANTIMEOUT_BIT) > 0
-
-        self.resetcause = {
-            "brownout": brownout,
-            "supervisor": supervisor,
-            "watchdog": watchdog,
-            "misc": misc,
-            "lpm5wakeup": lpm5wakeup,
-            "clockfail": clockfail,
-            "scantimeout": scantimeout
-        }
+        self.loopcount, self.resetsalltime, self.batv_resetcause = STATUS_STRUCT.unpack(decstr)
+        self._resetcause = None
+
+    @classmethod
+    def from_b64(cls, statb64: str) -> 'Status':
+        """
+        A tag's status string rarely changes between scans, so recently decoded status strings are cached.
+
+        Parameters
+        -----------
+        statb64:
+            Value of the URL parameter that holds status information (after base64 encoding).
+
+        Returns
+        --------
+        A Status object, which may be shared with other URLs.
+
+        """
+        if not isinstance(statb64, (str, bytes)):
+            # The cache key must be hashable.
+            statb64 = bytes(statb64)
+        return _cached_status(cls, statb64)
+
+    def __getstate__(self):
+        return self.statb64
+
+    def __setstate__(self, statb64):
+        self.__init__(statb64)
+
+    @property
+    def resetcause(self) -> dict:
+        """
+        Each reset cause flag keyed by name. The flags are decoded on first access.
+        """
+        if self._resetcause is None:
+            resetcauseraw = self.get_resetcauseraw()
+            self._resetcause = tuple((name, (resetcauseraw & bit) > 0) for name, bit in RESETCAUSE_BITS)
+        return dict(self._resetcause)
 
     def __str__(self):
         return "Reset cause: {}, " \
@@ -106,3 +148,84 @@ class Status:
         return (256 * 1500) / self.get_batvoltageraw()
 
 
+@lru_cache(maxsize=STATUS_CACHE_SIZE)
+def _cached_status(cls, statb64: str) -> Status:
+    return cls(statb64)
+
+
+class StatusColumns(NamedTuple):
+    """
+    Fields of many status strings, held as parallel columns. Element i of each column was decoded from status
+    string i.
+    """
+    loopcount: array
+    resetsalltime: array
+    batvoltageraw: array
+    resetcauseraw: array
+
+    def resetcause(self, name: str) -> list:
+        """
+
+        Parameters
+        ----------
+        name : str
+            Name of a reset cause. See :data:`RESETCAUSE_BITS`.
+
+        Returns
+        -------
+        A list with one bool per status string. True if that reset cause flag is set.
+        """
+        bit = dict(RESETCAUSE_BITS)[name]
+        return [(resetcauseraw & bit) > 0 for resetcauseraw in self.resetcauseraw]
+
+
+def decode_status_batch(statb64s) -> StatusColumns:
+    """
+    Decode many status strings into columns. All strings are joined and base64 decoded in one call, without
+    creating a :class:`Status` object for each.
+
+    Parameters
+    ----------
+    statb64s
+        Iterable of status strings (str or bytes-like), each :data:`STATUS_B64_LEN` characters long.
+
+    Returns
+    -------
+    StatusColumns
+        Loop count, resets all time, raw battery voltage and raw reset cause of each status string.
+
+    Raises
+    ------
+    InvalidStatusError
+        If a status string contains a character that is not URL safe base64. The decoder would skip it and shift
+        every later column element.
+
+    """
+    statb64s = list(statb64s)
+    joined = b"".join(map(to_ascii_bytes, statb64s))
+    if len(joined) != len(statb64s) * STATUS_B64_LEN:
+        raise ValueError("Each status string must be {} characters long.".format(STATUS_B64_LEN))
+
+    if joined.translate(None, URLSAFE_B64_ALPHABET):
+        # Only the error path checks each string, to find the first one that is malformed.
+        for index, statb64 in enumerate(statb64s):
+            if to_ascii_bytes(statb64).translate(None, URLSAFE_B64_ALPHABET):
+                raise InvalidStatusError(statb64, index)
+
+    decoded = B64Decoder.b64decode_buffer(joined, '=')
+    if len(decoded) != len(statb64s) * STATUS_STRUCT.size:
+        raise InvalidStatusError(statb64s, None, msg="Status strings did not decode to {} bytes each.".format(
+            STATUS_STRUCT.size))
+    fields = array('H')
+    fields.frombytes(decoded)
+
+    # batv_resetcause is the last unsigned short in native byte order. The reset cause is its least significant byte.
+    nfields = STATUS_STRUCT.size // fields.itemsize
+    if sys.byteorder == 'little':
+        resetcausebyte, batvoltagebyte = 4, 5
+    else:
+        resetcausebyte, batvoltagebyte = 5, 4
+    return StatusColumns(loopcount=fields[0::nfields],
+                         resetsalltime=fields[1::nfields],
+                         batvoltageraw=array('B', decoded[batvoltagebyte::STATUS_STRUCT.size]),
+                         resetcauseraw=array('B', decoded[resetcausebyte::STATUS_STRUCT.size]))
@@ -0,0 +1,126 @@
+#  cuplcodec encodes environmental sensor data into a URL and the reverse.
+#
+#  https://github.com/cuplsensor/cuplcodec
+#
+#  Original Author: Malcolm Mackay
+#  Email: malcolm@plotsensor.com
+#  Website: https://cupl.co.uk
+#
+#  Copyright (C) 2021. Plotsensor Ltd.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+from typing import NamedTuple
+from .pairs import PairsURL
+from .exceptions import MessageIntegrityError, InvalidMajorVersionError, MALFORMED_URL_ERRORS
+from .decoderfactory import _get_encoderversion, _get_decoderversion, _get_decoder
+
+
+class Verification(NamedTuple):
+    """
+    Result of :func:`verify`. Fields that could not be decoded are None.
+    """
+    valid: bool
+    serial: str
+    hash: str
+    npairs: int
+    loopcount: int
+    resetsalltime: int
+    endmarkerpos: int
+    formatcode: int
+    error: Exception
+
+
+class VerifyURL(PairsURL):
+    """
+    Authenticates the circular buffer without creating pairs, samples or timestamps.
+
+    A failed hash comparison is stored in :attr:`integrityerror` instead of being raised.
+    """
+    def _verify(self, usehmac: bool, secretkey: str):
+        self.integrityerror = None
+        try:
+            super()._verify(usehmac, secretkey)
+        except MessageIntegrityError as error:
+            self.integrityerror = error
+
+
+def verify(secretkey: str,
+           statb64: str,
+           circb64: str,
+           vfmtb64: str,
+           serial: str = None,
+           usehmac: bool = True) -> Verification:
+    """
+    Check that a URL is authentic without decoding its samples. The status, circular buffer and endstop are decoded
+    and the hash is checked in the same way as :func:`wscodec.decoder.decode`.
+
+    Parameters
+    -----------
+    secretkey, statb64, circb64, vfmtb64, usehmac:
+        As for :func:`wscodec.decoder.decode`.
+
+    serial: str
+        Tag serial. This is copied into the result.
+
+    Returns
+    --------
+    Verification
+        valid is True if the URL was decoded and its hash matches. Otherwise error holds the reason. No exception
+        is raised for a malformed or tampered URL. See :data:`wscodec.decoder.exceptions.MALFORMED_URL_ERRORS`.
+
+    """
+    formatcode = None
+    try:
+        encodermajorversion, formatcode = _get_encoderversion(vfmtb64)
+        decodermajorversion = _get_decoderversion()
+
+        if encodermajorversion != decodermajorversion:
+            raise InvalidMajorVersionError(encodermajorversion, decodermajorversion)
+
+        # Raises an error if there is no decoder for this format.
+        _get_decoder(formatcode)
+
+        verified = VerifyURL(statb64=statb64, circb64=circb64, usehmac=usehmac, secretkey=secretkey)
+    except MALFORMED_URL_ERRORS as error:
+        return Verification(valid=False, serial=serial, hash=None, npairs=None, loopcount=None, resetsalltime=None,
+                            endmarkerpos=None, formatcode=formatcode, error=error)
+
+    return Verification(valid=verified.integrityerror is None,
+                        serial=serial,
+                        hash=verified.hash,
+                        npairs=verified.npairs,
+                        loopcount=verified.status.loopcount,
+                        resetsalltime=verified.status.resetsalltime,
+                        endmarkerpos=verified.endmarkerpos,
+                        formatcode=formatcode,
+                        error=verified.integrityerror)
+
+
+def is_authentic(secretkey: str, statb64: str, circb64: str, vfmtb64: str, usehmac: bool = True) -> bool:
+    """
+
+    Parameters
+    -----------
+    secretkey, statb64, circb64, vfmtb64, usehmac:
+        As for :func:`wscodec.decoder.decode`.
+
+    Returns
+    --------
+    bool
+        True if the URL is authentic. See :func:`verify`.
+
+    """
+    return verify(secretkey=secretkey, statb64=statb64, circb64=circb64, vfmtb64=vfmtb64, usehmac=usehmac).valid